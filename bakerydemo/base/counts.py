@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.core.paginator import Paginator
+
+# The total number of items in a paginated listing is kept in the cache, so
+# that rendering a page of the listing doesn't need a COUNT(*). Counts are
+# stored per listing (e.g. the path of an index page) and filter (e.g. a search
+# query), and are kept up to date from the publish, unpublish and delete
+# signals: listings with a fixed set of filters are recounted straight away
+# with `update_listing_count`, while listings with open ended filters are
+# invalidated at once with `purge_listing_counts`.
+LISTING_COUNT_CACHE_KEY = "bakerydemo:listing_count:{}:{}:{}"
+LISTING_COUNT_GENERATION_KEY = "bakerydemo:listing_count_generation:{}"
+LISTING_COUNT_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_listing_count_key(listing, filter_value=""):
+    generation = cache.get(LISTING_COUNT_GENERATION_KEY.format(listing), 0)
+    return LISTING_COUNT_CACHE_KEY.format(listing, generation, filter_value)
+
+
+def get_listing_count(listing, queryset, filter_value=""):
+    key = get_listing_count_key(listing, filter_value)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.add(key, count, LISTING_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def update_listing_count(listing, queryset, filter_value=""):
+    cache.set(
+        get_listing_count_key(listing, filter_value),
+        queryset.count(),
+        LISTING_COUNT_CACHE_TIMEOUT,
+    )
+
+
+def purge_listing_counts(listing):
+    key = LISTING_COUNT_GENERATION_KEY.format(listing)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+class CountedPaginator(Paginator):
+    """
+    A Paginator that is handed the total count, e.g. from `get_listing_count`,
+    rather than querying for it.
+    """
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count = count
@@ -0,0 +1,156 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from wagtail.models import Page, ReferenceIndex
+
+# Records which content a cached page or fragment was rendered from, so that it
+# can be purged exactly when that content changes rather than on a short TTL.
+#
+# Dependencies are plain strings:
+#  - "page:<path>" for a page, by its materialized path
+#  - "children:<path>" for the live children of a page, used by listings
+#  - "<app_label>.<model_name>:<pk>" for any other object, e.g. a snippet
+#
+# Each dependency has a version number under DEPENDENCY_VERSION_CACHE_KEY,
+# which purging it increments. Cached entries store the versions of their
+# dependencies when they were rendered, and are stale as soon as one of them
+# has changed. Objects that are only used through a page (the authors of a
+# blog post, the bread type of a bread) don't need to be tracked: when they
+# change, the pages referencing them are found in Wagtail's reference index
+# and purged along with them.
+DEPENDENCY_VERSION_CACHE_KEY = "bakerydemo:dependency_version:{}"
+
+collected_dependencies = ContextVar("collected_dependencies", default=None)
+
+
+def page_dependency(path):
+    return f"page:{path}"
+
+
+def children_dependency(path):
+    return f"children:{path}"
+
+
+def object_dependency(obj):
+    return f"{obj._meta.label_lower}:{obj.pk}"
+
+
+def get_page_dependencies(path):
+    # A change to a page shows on the page itself and on its parent's listing
+    return [page_dependency(path), children_dependency(path[: -Page.steplen])]
+
+
+@contextmanager
+def collect_dependencies(snapshot=None):
+    """
+    Collects the dependencies tracked while rendering inside the block into
+    the dict it yields, along with their versions. A version is read when its
+    dependency is first tracked, before the content is read from it, unless
+    it is in `snapshot`, the versions read before rendering started. Either
+    way, a change made while rendering leaves the entry stale.
+    """
+    versions = {}
+    token = collected_dependencies.set((versions, snapshot or {}))
+    try:
+        yield versions
+    finally:
+        collected_dependencies.reset(token)
+
+
+def track_dependencies(*dependencies):
+    collected = collected_dependencies.get()
+    if collected is None:
+        return
+    versions, snapshot = collected
+    missing = set(dependencies) - versions.keys()
+    versions.update(
+        {dependency: snapshot[dependency] for dependency in missing & snapshot.keys()}
+    )
+    missing -= snapshot.keys()
+    if missing:
+        versions.update(get_dependency_versions(missing))
+
+
+def get_dependency_versions(dependencies):
+    """
+    Returns the current version of each of `dependencies`, to be stored with
+    an entry rendered from them.
+    """
+    keys = {
+        DEPENDENCY_VERSION_CACHE_KEY.format(dependency): dependency
+        for dependency in dependencies
+    }
+    versions = cache.get_many(keys)
+    for key in keys.keys() - versions.keys():
+        # Versions that were evicted start again from a new value, so that the
+        # entries rendered before don't look current
+        cache.add(key, time.time_ns(), None)
+        versions[key] = cache.get(key)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def is_current(versions):
+    """
+    Returns whether none of the dependencies in `versions` changed since.
+    Entries stored without versions aren't.
+    """
+    if versions is None:
+        return False
+    return not versions or get_dependency_versions(versions) == versions
+
+
+def purge_dependents(*dependencies):
+    for dependency in set(dependencies):
+        try:
+            cache.incr(DEPENDENCY_VERSION_CACHE_KEY.format(dependency))
+        except ValueError:
+            # Not set, so there is nothing rendered from it that's current
+            pass
+
+
+def get_referencing_dependencies(obj, depth=2):
+    """
+    Returns the dependencies of everything referencing `obj` according to the
+    reference index. Objects that aren't pages (e.g. a person referencing an
+    image) are followed up to `depth` levels.
+    """
+    references = set(
+        ReferenceIndex.get_references_to(obj).values_list(
+            "base_content_type_id", "object_id"
+        )
+    )
+    page_content_type_id = ContentType.objects.get_for_model(Page).id
+    page_ids = [
+        object_id
+        for content_type_id, object_id in references
+        if content_type_id == page_content_type_id
+    ]
+
+    dependencies = []
+    for path in Page.objects.filter(pk__in=page_ids).values_list("path", flat=True):
+        dependencies += get_page_dependencies(path)
+
+    for content_type_id, object_id in references:
+        if content_type_id == page_content_type_id:
+            continue
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is None:
+            continue
+        dependencies.append(f"{model._meta.label_lower}:{object_id}")
+        if depth > 1:
+            referencing = model(pk=model._meta.pk.to_python(object_id))
+            dependencies += get_referencing_dependencies(referencing, depth - 1)
+    return dependencies
+
+
+def purge_page_dependents(page):
+    purge_dependents(
+        *get_page_dependencies(page.path), *get_referencing_dependencies(page)
+    )
+
+
+def purge_object_dependents(obj):
+    purge_dependents(object_dependency(obj), *get_referencing_dependencies(obj))
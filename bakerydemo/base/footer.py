@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.utils import translation
+from django.utils.safestring import mark_safe
+from wagtail.coreutils import (
+    get_content_languages,
+    get_supported_content_language_variant,
+)
+from wagtail.templatetags.wagtailcore_tags import richtext
+
+from .models import FooterText
+
+# The rendered footer is cached per content language, as FooterText is
+# translatable. It only changes when a FooterText is published or unpublished.
+FOOTER_TEXT_CACHE_KEY = "bakerydemo:footer_text:{}"
+
+
+def get_active_language_code():
+    try:
+        return get_supported_content_language_variant(translation.get_language())
+    except LookupError:
+        return None
+
+
+def render_footer_text(language_code):
+    live = FooterText.objects.filter(live=True)
+    # Fall back to any live footer text if it hasn't been translated yet
+    instance = live.filter(locale__language_code=language_code).first() or live.first()
+    return richtext(instance.body) if instance else ""
+
+
+def get_footer_text_html():
+    language_code = get_active_language_code()
+    key = FOOTER_TEXT_CACHE_KEY.format(language_code)
+    html = cache.get(key)
+    if html is None:
+        html = render_footer_text(language_code)
+        cache.set(key, html, None)
+    return mark_safe(html)
+
+
+def purge_footer_text_cache():
+    cache.delete_many(
+        [
+            FOOTER_TEXT_CACHE_KEY.format(language_code)
+            for language_code in [*get_content_languages(), None]
+        ]
+    )
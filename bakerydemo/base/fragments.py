@@ -0,0 +1,81 @@
+import hashlib
+
+from django.core.cache import cache
+from django.utils import translation
+
+from .dependencies import (
+    get_dependency_versions,
+    page_dependency,
+    track_dependencies,
+)
+from .sites import get_site_and_root_page
+
+# Fragments rendered from a single page, like the cards of the listings, are
+# cached under a key made of the page's live revision, publishing time and URL
+# path, so that they change as soon as the page is published or moved. Other
+# content shown in them (images, authors, bread types and countries) is
+# referenced by the page, and the fragments are purged along with the page's
+# other dependents when it changes, see base/dependencies.py. Entries are
+# stored with the version of the page's dependency they were rendered with.
+PAGE_FRAGMENT_CACHE_KEY = "bakerydemo:page_fragment:v2:{}"
+PAGE_FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_page_fragment_key(name, page, request, vary_on=()):
+    site = get_site_and_root_page(request)[0] if request else None
+    parts = [
+        name,
+        page.pk,
+        page.live_revision_id,
+        page.last_published_at,
+        page.url_path,
+        site.pk if site else None,
+        translation.get_language(),
+        *vary_on,
+    ]
+    digest = hashlib.md5(":".join(str(part) for part in parts).encode()).hexdigest()
+    return PAGE_FRAGMENT_CACHE_KEY.format(digest)
+
+
+def prefetch_page_fragments(name, pages, request, vary_on=()):
+    """
+    Looks up the fragment `name` of all `pages` with a single cache lookup,
+    and keeps them on the request for render_page_fragment. Returns the pages
+    whose fragment isn't cached, for the view to load what rendering them
+    needs.
+    """
+    keys = {get_page_fragment_key(name, page, request, vary_on): page for page in pages}
+    entries = cache.get_many(keys)
+    # The versions of all the fragments' pages are checked with one lookup too
+    versions = get_dependency_versions(
+        {dependency for entry in entries.values() for dependency in entry[0]}
+    )
+    fragments = {
+        key: content
+        for key, (entry_versions, content) in entries.items()
+        if all(versions.get(d) == v for d, v in entry_versions.items())
+    }
+    request.page_fragments = {**getattr(request, "page_fragments", {}), **fragments}
+    return [page for key, page in keys.items() if key not in fragments]
+
+
+def render_page_fragment(name, page, request, render, vary_on=()):
+    """
+    Returns the fragment `name` of `page` from the cache, or renders it with
+    `render` and caches it.
+    """
+    key = get_page_fragment_key(name, page, request, vary_on)
+    dependencies = [page_dependency(page.path)]
+    # Pages cached as a whole depend on the fragment's content too
+    track_dependencies(*dependencies)
+    content = getattr(request, "page_fragments", {}).get(key)
+    if content is not None:
+        return content
+
+    versions = get_dependency_versions(dependencies)
+    entry = cache.get(key)
+    if entry is not None and entry[0] == versions:
+        return entry[1]
+    content = render()
+    cache.set(key, (versions, content), PAGE_FRAGMENT_CACHE_TIMEOUT)
+    return content
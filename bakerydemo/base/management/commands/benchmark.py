@@ -0,0 +1,242 @@
+import json
+import math
+import platform
+import statistics
+import time
+import tracemalloc
+
+import django
+import wagtail
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.http.request import validate_host
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from taggit.models import Tag
+from wagtail.images import get_image_model
+from wagtail.models import Page, Site
+
+from bakerydemo.blog.models import BlogIndexPage
+from bakerydemo.breads.models import BreadPage, BreadsIndexPage
+from bakerydemo.locations.models import LocationPage
+from bakerydemo.recipes.models import RecipePage
+
+BENCHMARK_SEARCH_QUERY = "bread"
+
+
+def percentile(sorted_values, percent):
+    # Nearest-rank percentile, which is exact for the small samples we take
+    index = max(0, math.ceil(percent / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks rendering the main page types and API endpoints with the "
+        "test client, and reports latency percentiles, queries and memory per "
+        "request as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=50,
+            help="How many timed requests to make to each URL",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=3,
+            help="How many untimed requests to make to each URL first, to fill "
+            "the caches",
+        )
+        parser.add_argument(
+            "--pages",
+            type=int,
+            default=0,
+            help="Create this many random pages of each type before benchmarking, "
+            "with create_random_data --bulk",
+        )
+        parser.add_argument(
+            "--snippets",
+            type=int,
+            default=10,
+            help="How many random snippets of each type to create with --pages",
+        )
+        parser.add_argument(
+            "--images",
+            type=int,
+            default=10,
+            help="How many random images to create with --pages",
+        )
+        parser.add_argument(
+            "--profile",
+            default="production",
+            help="The create_random_data profile to use with --pages",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Seed for the random data created with --pages",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write the results to this file rather than to stdout",
+        )
+
+    def get_urls(self):
+        """
+        Returns the URL to benchmark for each page type, for those that have
+        a live page.
+        """
+        site = Site.objects.get(is_default_site=True)
+        urls = {"home": site.root_page.url}
+
+        breads_index = BreadsIndexPage.objects.live().first()
+        if breads_index:
+            urls["breads_index"] = breads_index.url
+            urls["breads_index_page_2"] = f"{breads_index.url}?page=2"
+
+        blog_index = BlogIndexPage.objects.live().first()
+        if blog_index:
+            urls["blog_index"] = blog_index.url
+            tag = (
+                Tag.objects.filter(blog_blogpagetag_items__content_object__live=True)
+                .order_by("name")
+                .first()
+            )
+            if tag:
+                urls["blog_tag_archive"] = f"{blog_index.url}tags/{tag.slug}/"
+
+        for name, model in [
+            ("bread", BreadPage),
+            ("location", LocationPage),
+            ("recipe", RecipePage),
+        ]:
+            page = model.objects.live().order_by("path").first()
+            if page:
+                urls[name] = page.url
+
+        urls["search"] = f"/search/?q={BENCHMARK_SEARCH_QUERY}"
+        urls["api_pages"] = "/api/v2/pages/"
+        urls["api_pages_detail"] = f"/api/v2/pages/{site.root_page_id}/"
+        urls["api_images"] = "/api/v2/images/"
+        urls["api_documents"] = "/api/v2/documents/"
+        return urls
+
+    def get_host(self):
+        """
+        Returns the host to make the requests to: the default site's if it's
+        allowed, otherwise the first allowed host that isn't a pattern.
+        """
+        hostname = Site.objects.get(is_default_site=True).hostname
+        if validate_host(hostname, settings.ALLOWED_HOSTS):
+            return hostname
+        for host in settings.ALLOWED_HOSTS:
+            if host != "*" and not host.startswith("."):
+                return host
+        raise CommandError("Add the default site's hostname to ALLOWED_HOSTS")
+
+    def get(self, client, url):
+        # Over HTTPS, so that SECURE_SSL_REDIRECT doesn't redirect every request
+        response = client.get(url, secure=True)
+        if response.status_code != 200:
+            raise CommandError(f"{url} returned {response.status_code}")
+        return response
+
+    def benchmark_url(self, client, url, requests, warmup):
+        for _ in range(warmup):
+            self.get(client, url)
+
+        timings = []
+        for _ in range(requests):
+            started_at = time.perf_counter()
+            response = self.get(client, url)
+            timings.append((time.perf_counter() - started_at) * 1000)
+        timings.sort()
+
+        # Queries and memory are measured on one more request, as tracing
+        # slows the requests down too much to be timed
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.get(client, url)
+            # The most memory allocated at once while handling the request
+            allocated = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "url": url,
+            "status": response.status_code,
+            "requests": requests,
+            "latency_ms": {
+                "min": round(timings[0], 3),
+                "p50": round(percentile(timings, 50), 3),
+                "p95": round(percentile(timings, 95), 3),
+                "p99": round(percentile(timings, 99), 3),
+                "max": round(timings[-1], 3),
+                "mean": round(statistics.fmean(timings), 3),
+            },
+            "queries": len(queries),
+            "allocated_bytes": allocated,
+            "response_bytes": len(response.content),
+        }
+
+    def handle(self, **options):
+        if options["requests"] < 1:
+            raise CommandError("--requests must be at least 1")
+
+        if options["pages"]:
+            call_command(
+                "create_random_data",
+                options["pages"],
+                options["snippets"],
+                options["images"],
+                bulk=True,
+                profile=options["profile"],
+                seed=options["seed"],
+                stdout=self.stderr,
+            )
+            call_command("update_index_incremental", stdout=self.stderr)
+
+        # Responses other than 200 abort the run, as their timings would be
+        # meaningless
+        client = Client(raise_request_exception=False, HTTP_HOST=self.get_host())
+        results = {}
+        for name, url in self.get_urls().items():
+            self.stderr.write(f"Benchmarking {name} ({url})...")
+            results[name] = self.benchmark_url(
+                client, url, options["requests"], options["warmup"]
+            )
+
+        report = {
+            "created_at": timezone.now().isoformat(),
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "wagtail": wagtail.__version__,
+                "settings": settings.SETTINGS_MODULE,
+                "debug": settings.DEBUG,
+                "database": connection.vendor,
+                "cache": settings.CACHES["default"]["BACKEND"],
+                "search": settings.WAGTAILSEARCH_BACKENDS["default"]["BACKEND"],
+            },
+            "dataset": {
+                "pages": Page.objects.live().count(),
+                "images": get_image_model().objects.count(),
+            },
+            "results": results,
+        }
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        else:
+            self.stdout.write(output)
@@ -1,16 +1,47 @@
+import json
 import random
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import time as datetime_time
 from pathlib import Path
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F
 from django.utils import lorem_ipsum, timezone
 from django.utils.text import slugify
-from wagtail.images.models import Image
-from wagtail.rich_text import RichText
+from taggit.models import Tag
+from wagtail.embeds.embeds import get_embed_hash
+from wagtail.embeds.models import Embed
+from wagtail.images.models import Filter, Image
+from wagtail.models import Locale, Page
 from willow.image import Image as WillowImage
 
+from bakerydemo.base.counts import purge_listing_counts
+from bakerydemo.base.dependencies import children_dependency, purge_dependents
+from bakerydemo.base.footer import purge_footer_text_cache
 from bakerydemo.base.models import FooterText, HomePage, Person, StandardPage
-from bakerydemo.blog.models import BlogIndexPage, BlogPage
+from bakerydemo.base.navigation import purge_navigation_cache
+from bakerydemo.base.page_cache import purge_page_cache
+from bakerydemo.base.renditions import (
+    BLOG_LISTING_CARD_RENDITIONS,
+    LISTING_CARD_RENDITIONS,
+    LOCATION_CARD_RENDITIONS,
+    disable_rendition_warmup,
+)
+from bakerydemo.base.workers import init_worker
+from bakerydemo.blog.models import (
+    CHILD_TAGS_CACHE_KEY,
+    BlogIndexPage,
+    BlogPage,
+    BlogPageTag,
+    BlogPersonRelationship,
+)
 from bakerydemo.breads.models import (
     BreadIngredient,
     BreadPage,
@@ -18,10 +49,112 @@ from bakerydemo.breads.models import (
     BreadType,
     Country,
 )
-from bakerydemo.locations.models import LocationPage, LocationsIndexPage
+from bakerydemo.locations.choices import DAY_CHOICES
+from bakerydemo.locations.models import (
+    LocationOperatingHours,
+    LocationPage,
+    LocationsIndexPage,
+)
+from bakerydemo.recipes.models import (
+    RecipeIndexPage,
+    RecipePage,
+    RecipePersonRelationship,
+)
+from bakerydemo.search.autocomplete import bump_autocomplete_version
+from bakerydemo.search.results import purge_search_results_cache
 
 FIXTURE_MEDIA_DIR = Path(settings.PROJECT_DIR) / "base/fixtures/media/original_images"
 
+# Renditions generated for new images with --bulk, so that the listings don't
+# have to generate them on first view
+RANDOM_IMAGE_RENDITIONS = [
+    spec
+    for filter_spec in (
+        LISTING_CARD_RENDITIONS,
+        BLOG_LISTING_CARD_RENDITIONS,
+        LOCATION_CARD_RENDITIONS,
+    )
+    for spec in Filter.expand_spec(filter_spec)
+]
+
+# The shape of the generated content. Numbers can be given as a fixed value,
+# or as {"min", "max", "mode"} for a triangular distribution. "blocks" is the
+# number of blocks in each StreamField, picked from "block_mix" by weight,
+# among the blocks the field allows and within its block_counts. Standard
+# pages are laid out "tree.depth" levels deep below the home page, starting
+# with a single top level page, with "tree.fan_out" children per page on the
+# levels in between. Other profiles
+# are JSON files with any of these keys.
+PROFILES = {
+    # The same shape of content as before profiles were added
+    "minimal": {
+        "blocks": 1,
+        "block_mix": {"paragraph_block": 1},
+        "paragraphs": 5,
+        "list_items": 2,
+        "table_rows": 2,
+        "tags": {"vocabulary": 0, "per_page": 0},
+        "authors": 0,
+        "operating_hours": 0,
+        "tree": {"depth": 2, "fan_out": None},
+    },
+    # Close to the content of the demo site, see fixtures/bakerydemo.json
+    "production": {
+        "blocks": {"min": 2, "max": 20, "mode": 6},
+        "block_mix": {
+            "paragraph_block": 10,
+            "heading_block": 3,
+            "image_block": 3,
+            "block_quote": 1,
+            "embed_block": 1,
+            "table_block": 1,
+            "typed_table_block": 1,
+            "ingredients_list": 3,
+            "steps_list": 3,
+        },
+        "paragraphs": {"min": 1, "max": 4, "mode": 1},
+        "list_items": {"min": 2, "max": 10, "mode": 5},
+        "table_rows": {"min": 2, "max": 8},
+        "tags": {"vocabulary": 30, "per_page": {"min": 0, "max": 6, "mode": 2}},
+        "authors": {"min": 1, "max": 3, "mode": 1},
+        "operating_hours": {"min": 5, "max": 7, "mode": 7},
+        "tree": {"depth": 3, "fan_out": 5},
+    },
+}
+
+# Embeds are rendered from the embed cache table, which is filled in for these
+# so that rendering them doesn't call out to the provider
+EMBED_URLS = ["https://www.youtube.com/watch?v=mwrGSfiB1Mg"]
+
+# The child objects of the generated pages, inserted along with them by --bulk
+CHILD_RELATIONS = {
+    BlogPage: ["tagged_items", "blog_person_relationship"],
+    LocationPage: ["hours_of_operation"],
+    RecipePage: ["recipe_person_relationship"],
+}
+
+
+def create_image(image_path, title, renditions=()):
+    """
+    Creates an image from one of the fixture images, and generates the given
+    renditions of it. Runs in a worker process with --bulk, which may exit
+    before renditions generated in the background are done.
+    """
+    image_path = Path(image_path)
+    with image_path.open(mode="rb") as image_file, disable_rendition_warmup():
+        width, height = WillowImage.open(image_file).get_size()
+        image = Image.objects.create(
+            title=title,
+            width=width,
+            height=height,
+            file_size=image_path.stat().st_size,
+        )
+        image_file.seek(0)
+        image.file.save(image_path.name, image_file)
+    if renditions:
+        image.get_renditions(*renditions)
+    return image.pk
+
 
 class Command(BaseCommand):
     help = "Creates random data. Useful for performance or load testing."
@@ -42,134 +175,562 @@ class Command(BaseCommand):
             type=int,
             help="How many images to create",
         )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Insert pages and snippets in batches, and create images in "
+            "parallel. Skips signals, so run update_index_incremental afterwards.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="How many rows to insert at a time with --bulk",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="How many processes create images with --bulk",
+        )
+        parser.add_argument(
+            "--profile",
+            default="minimal",
+            help="The shape of the content: one of "
+            f"{', '.join(PROFILES)}, or the path to a JSON profile",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            help="Seed for the random generator, to create the same data every time",
+        )
 
-    def fake_stream_field(self):
-        return [("paragraph_block", RichText("\n".join(lorem_ipsum.paragraphs(5))))]
+    def load_profile(self, profile):
+        if profile in PROFILES:
+            return PROFILES[profile]
+        try:
+            with open(profile) as f:
+                return {**PROFILES["minimal"], **json.load(f)}
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot load the profile {profile}: {e}")
+
+    def sample(self, value):
+        # A number from the profile, either fixed or from a distribution
+        if isinstance(value, dict):
+            value = random.triangular(value["min"], value["max"], value.get("mode"))
+        return round(value)
+
+    def get_candidate_ids(self, model):
+        # The candidate ids are loaded once per model rather than sorting the
+        # whole table for every field of every page
+        if model not in self.candidate_ids:
+            self.candidate_ids[model] = list(
+                model.objects.order_by("pk").values_list("pk", flat=True)
+            )
+        return self.candidate_ids[model]
 
-    def get_random_model(self, model):
-        return model.objects.order_by("?").first()
+    def get_random_id(self, model):
+        candidates = self.get_candidate_ids(model)
+        return random.choice(candidates) if candidates else None
+
+    def get_random_ids(self, model, count):
+        candidates = self.get_candidate_ids(model)
+        return random.sample(candidates, min(count, len(candidates)))
 
     def make_title(self):
         return lorem_ipsum.words(4, common=False)
 
+    def make_uuid(self):
+        # Drawn from the seeded generator, unlike uuid4
+        return uuid.UUID(int=random.getrandbits(128))
+
+    def make_rich_text(self, paragraphs):
+        return "".join(
+            f"<p>{paragraph}</p>"
+            for paragraph in lorem_ipsum.paragraphs(paragraphs, common=False)
+        )
+
+    def make_paragraph_block(self):
+        return self.make_rich_text(self.sample(self.profile["paragraphs"]))
+
+    def make_heading_block(self):
+        return {
+            "heading_text": lorem_ipsum.words(random.randint(2, 6), common=False),
+            "size": random.choice(["", "h2", "h3", "h4"]),
+        }
+
+    def make_image_block(self):
+        return {
+            "image": self.get_random_id(Image),
+            "caption": lorem_ipsum.words(5, common=False),
+            "attribution": lorem_ipsum.words(2, common=False),
+        }
+
+    def make_block_quote(self):
+        return {
+            "text": lorem_ipsum.sentence(),
+            "attribute_name": lorem_ipsum.words(2, common=False),
+        }
+
+    def make_embed_block(self):
+        return random.choice(EMBED_URLS)
+
+    def make_table_block(self):
+        columns = random.randint(2, 5)
+        return {
+            "data": [
+                [lorem_ipsum.words(2, common=False) for _ in range(columns)]
+                for _ in range(self.sample(self.profile["table_rows"]) + 1)
+            ],
+            "first_row_is_table_header": True,
+            "first_col_is_header": False,
+            "table_caption": lorem_ipsum.words(4, common=False),
+        }
+
+    def make_typed_table_block(self):
+        return {
+            "columns": [
+                {"type": "text", "heading": "Ingredient"},
+                {"type": "numeric", "heading": "Grams"},
+            ],
+            "rows": [
+                {"values": [lorem_ipsum.words(1, common=False), random.randint(5, 500)]}
+                for _ in range(self.sample(self.profile["table_rows"]))
+            ],
+        }
+
+    def make_list(self, make_item):
+        return [
+            {"type": "item", "value": make_item(), "id": str(self.make_uuid())}
+            for _ in range(self.sample(self.profile["list_items"]))
+        ]
+
+    def make_ingredients_list(self):
+        return self.make_list(lambda: self.make_rich_text(1))
+
+    def make_steps_list(self):
+        return self.make_list(
+            lambda: {
+                "text": self.make_rich_text(1),
+                "difficulty": random.choice(["S", "M", "L"]),
+            }
+        )
+
+    def make_stream(self, model, field_name):
+        """
+        Returns the raw data for a `StreamField` of `model`, with a mix of the
+        blocks it allows as set in the profile.
+        """
+        stream_block = model._meta.get_field(field_name).stream_block
+        block_counts = stream_block.meta.block_counts
+        block_mix = {
+            name: weight
+            for name, weight in self.profile["block_mix"].items()
+            if name in stream_block.child_blocks and weight > 0
+        }
+        if not self.get_candidate_ids(Image):
+            block_mix.pop("image_block", None)
+
+        counts = Counter()
+        blocks = []
+        for _ in range(self.sample(self.profile["blocks"])):
+            if not block_mix:
+                break
+            name = random.choices(list(block_mix), weights=list(block_mix.values()))[0]
+            blocks.append(
+                {
+                    "type": name,
+                    "value": getattr(self, f"make_{name}")(),
+                    "id": str(self.make_uuid()),
+                }
+            )
+            counts[name] += 1
+            if counts[name] == block_counts.get(name, {}).get("max_num"):
+                del block_mix[name]
+        return blocks
+
+    def make_authors(self, relationship_model):
+        return [
+            relationship_model(person_id=person_id, sort_order=index)
+            for index, person_id in enumerate(
+                self.get_random_ids(Person, self.sample(self.profile["authors"]))
+            )
+        ]
+
+    def report_progress(self, label, done, total, started_at):
+        elapsed = time.monotonic() - started_at
+        self.stdout.write(
+            f"  {done}/{total} {label} ({done / elapsed if elapsed else 0:.0f} rows/s)"
+        )
+
+    def make_bread_page(self):
+        title = self.make_title()
+        return BreadPage(
+            title=title,
+            slug=slugify(title),
+            introduction=lorem_ipsum.paragraph(),
+            bread_type_id=self.get_random_id(BreadType),
+            body=self.make_stream(BreadPage, "body"),
+            origin_id=self.get_random_id(Country),
+            image_id=self.get_random_id(Image),
+        )
+
+    def make_location_page(self):
+        title = self.make_title()
+        page = LocationPage(
+            title=title,
+            slug=slugify(title),
+            introduction=lorem_ipsum.paragraph(),
+            image_id=self.get_random_id(Image),
+            address=lorem_ipsum.paragraph(),
+            body=self.make_stream(LocationPage, "body"),
+            lat_long="64.144367, -21.939182",
+        )
+        # Profiles may ask for more days than there are in a week
+        day_count = min(self.sample(self.profile["operating_hours"]), len(DAY_CHOICES))
+        days = random.sample(range(len(DAY_CHOICES)), day_count)
+        page.hours_of_operation = [
+            LocationOperatingHours(
+                day=DAY_CHOICES[day][0],
+                opening_time=datetime_time(random.randint(6, 10)),
+                closing_time=datetime_time(random.randint(16, 21)),
+                closed=False,
+                sort_order=index,
+            )
+            for index, day in enumerate(sorted(days))
+        ]
+        return page
+
+    def make_blog_page(self):
+        title = self.make_title()
+        page = BlogPage(
+            title=title,
+            slug=slugify(title),
+            introduction=lorem_ipsum.paragraph(),
+            body=self.make_stream(BlogPage, "body"),
+            subtitle=lorem_ipsum.words(10, common=False),
+            date_published=timezone.now(),
+        )
+        page.tagged_items = [
+            BlogPageTag(tag_id=tag_id)
+            for tag_id in self.get_random_ids(
+                Tag, self.sample(self.profile["tags"]["per_page"])
+            )
+        ]
+        page.blog_person_relationship = self.make_authors(BlogPersonRelationship)
+        return page
+
+    def make_recipe_page(self):
+        title = self.make_title()
+        page = RecipePage(
+            title=title,
+            slug=slugify(title),
+            introduction=lorem_ipsum.paragraph(),
+            subtitle=lorem_ipsum.words(10, common=False),
+            date_published=timezone.now(),
+            backstory=self.make_stream(RecipePage, "backstory"),
+            recipe_headline=lorem_ipsum.words(8, common=False),
+            body=self.make_stream(RecipePage, "body"),
+        )
+        page.recipe_person_relationship = self.make_authors(RecipePersonRelationship)
+        return page
+
+    def make_standard_page(self):
+        title = self.make_title()
+        return StandardPage(
+            title=title,
+            slug=slugify(title),
+            introduction=lorem_ipsum.paragraph(),
+            image_id=self.get_random_id(Image),
+            body=self.make_stream(StandardPage, "body"),
+        )
+
+    def add_children(self, parent, make_page, page_count):
+        self.parent_paths.add(parent.path)
+        if not self.bulk:
+            return [parent.add_child(instance=make_page()) for _ in range(page_count)]
+
+        # Allocate the tree paths of the new pages after the parent's last
+        # child, the way treebeard's add_child would, and insert them a batch
+        # at a time: first the `Page` rows, then the rows of the specific model.
+        last_child = parent.get_last_child()
+        position = Page._str2int(last_child.path[-Page.steplen :]) if last_child else 0
+        slugs = set(parent.get_children().values_list("slug", flat=True))
+        started_at = time.monotonic()
+        children = []
+        for done in range(0, page_count, self.batch_size):
+            now = timezone.now()
+            pages = []
+            for _ in range(min(self.batch_size, page_count - done)):
+                page = make_page()
+                position += 1
+                slug = page.slug
+                while page.slug in slugs:
+                    page.slug = f"{slug}-{random.randint(2, 999999)}"
+                slugs.add(page.slug)
+                page.path = Page._get_path(parent.path, parent.depth + 1, position)
+                page.depth = parent.depth + 1
+                page.numchild = 0
+                page.url_path = f"{parent.url_path}{page.slug}/"
+                page.content_type = ContentType.objects.get_for_model(page)
+                page.locale_id = parent.locale_id
+                page.translation_key = self.make_uuid()
+                page.draft_title = page.title
+                page.live = True
+                page.has_unpublished_changes = False
+                page.first_published_at = page.last_published_at = now
+                pages.append(page)
+            self.bulk_insert_pages(parent, pages)
+            children.extend(pages)
+            self.report_progress(
+                type(pages[0])._meta.verbose_name_plural,
+                done + len(pages),
+                page_count,
+                started_at,
+            )
+        return children
+
+    @transaction.atomic
+    def bulk_insert_pages(self, parent, pages):
+        model = type(pages[0])
+        Page.objects.bulk_create(
+            [
+                Page(
+                    **{
+                        field.attname: getattr(page, field.attname)
+                        for field in Page._meta.concrete_fields
+                        if not field.primary_key
+                    }
+                )
+                for page in pages
+            ]
+        )
+        # Not every database returns the ids of bulk inserted rows
+        page_ids = dict(
+            Page.objects.filter(path__in=[page.path for page in pages]).values_list(
+                "path", "pk"
+            )
+        )
+        for page in pages:
+            page.pk = page.page_ptr_id = page_ids[page.path]
+        # Django can't bulk create multi-table inherited models, so the specific
+        # rows are inserted the same way Model.save() inserts them
+        model._base_manager._insert(pages, fields=model._meta.local_concrete_fields)
+        for relation_name in CHILD_RELATIONS.get(model, []):
+            relation = model._meta.get_field(relation_name)
+            children = []
+            for page in pages:
+                for child in getattr(page, relation_name).all():
+                    setattr(child, relation.field.attname, page.pk)
+                    children.append(child)
+            relation.related_model.objects.bulk_create(children)
+        Page.objects.filter(pk=parent.pk).update(numchild=F("numchild") + len(pages))
+        parent.numchild += len(pages)
+
+    def bulk_create_snippets(self, model, make_snippet, snippet_count):
+        if not self.bulk:
+            for _ in range(snippet_count):
+                make_snippet().save()
+            return
+
+        started_at = time.monotonic()
+        for done in range(0, snippet_count, self.batch_size):
+            snippets = [
+                make_snippet()
+                for _ in range(min(self.batch_size, snippet_count - done))
+            ]
+            model.objects.bulk_create(snippets)
+            self.report_progress(
+                model._meta.verbose_name_plural,
+                done + len(snippets),
+                snippet_count,
+                started_at,
+            )
+
     def create_pages(self, page_count):
         self.stdout.write("Creating bread pages...")
         breads_index = BreadsIndexPage.objects.live().first()
-        for _ in range(page_count):
-            title = self.make_title()
-            breads_index.add_child(
-                instance=BreadPage(
-                    title=title,
-                    slug=slugify(title),
-                    introduction=lorem_ipsum.paragraph(),
-                    bread_type=self.get_random_model(BreadType),
-                    body=self.fake_stream_field(),
-                    origin=self.get_random_model(Country),
-                    image=self.get_random_model(Image),
-                )
-            )
+        self.add_children(breads_index, self.make_bread_page, page_count)
 
         self.stdout.write("Creating location pages...")
         locations_index = LocationsIndexPage.objects.live().first()
-        for _ in range(page_count):
-            title = self.make_title()
-            locations_index.add_child(
-                instance=LocationPage(
-                    title=title,
-                    slug=slugify(title),
-                    introduction=lorem_ipsum.paragraph(),
-                    image=self.get_random_model(Image),
-                    address=lorem_ipsum.paragraph(),
-                    body=self.fake_stream_field(),
-                    lat_long="64.144367, -21.939182",
-                )
-            )
+        self.add_children(locations_index, self.make_location_page, page_count)
 
         self.stdout.write("Creating blog pages...")
         blog_index = BlogIndexPage.objects.live().first()
-        for _ in range(page_count):
-            title = self.make_title()
-            blog_index.add_child(
-                instance=BlogPage(
-                    title=title,
-                    slug=slugify(title),
-                    introduction=lorem_ipsum.paragraph(),
-                    body=self.fake_stream_field(),
-                    subtitle=lorem_ipsum.words(10, common=False),
-                    date_published=timezone.now(),
-                )
-            )
+        self.add_children(blog_index, self.make_blog_page, page_count)
+
+        self.stdout.write("Creating recipe pages...")
+        recipes_index = RecipeIndexPage.objects.live().first()
+        self.add_children(recipes_index, self.make_recipe_page, page_count)
 
         self.stdout.write("Creating standard pages...")
-        homepage = HomePage.objects.live().first()
-        title = self.make_title()
-        # Nest the standard pages under a top level one
-        top_level_page = homepage.add_child(
-            instance=StandardPage(
-                title=title,
-                slug=slugify(title),
-                introduction=lorem_ipsum.paragraph(),
-                image=self.get_random_model(Image),
-                body=self.fake_stream_field(),
-            )
-        )
-        for _ in range(page_count):
-            title = self.make_title()
-            top_level_page.add_child(
-                instance=StandardPage(
-                    title=title,
-                    slug=slugify(title),
-                    introduction=lorem_ipsum.paragraph(),
-                    image=self.get_random_model(Image),
-                    body=self.fake_stream_field(),
+        # Nest the standard pages under a single top level one, which counts
+        # toward page_count
+        parents = [HomePage.objects.live().first()]
+        remaining = page_count
+        depth = self.profile["tree"]["depth"]
+        for level in range(1, depth + 1):
+            if level == depth:
+                # The last level has the rest of the pages
+                per_parent = -(-remaining // len(parents))
+            elif level == 1:
+                per_parent = 1
+            else:
+                per_parent = self.profile["tree"]["fan_out"]
+            children = []
+            for parent in parents:
+                count = min(per_parent, remaining)
+                if not count:
+                    break
+                children.extend(
+                    self.add_children(parent, self.make_standard_page, count)
                 )
-            )
+                remaining -= count
+            if not children:
+                break
+            parents = children
 
     def create_snippets(self, snippet_count):
         self.stdout.write("Creating countries...")
-        for _ in range(snippet_count):
-            Country.objects.create(title=self.make_title())
+        self.bulk_create_snippets(
+            Country, lambda: Country(title=self.make_title()), snippet_count
+        )
 
         self.stdout.write("Creating bread ingredients...")
-        for _ in range(snippet_count):
-            BreadIngredient.objects.create(name=self.make_title())
+        self.bulk_create_snippets(
+            BreadIngredient,
+            lambda: BreadIngredient(name=self.make_title()),
+            snippet_count,
+        )
 
         self.stdout.write("Creating bread types...")
-        for _ in range(snippet_count):
-            BreadType.objects.create(title=self.make_title())
+        self.bulk_create_snippets(
+            BreadType, lambda: BreadType(title=self.make_title()), snippet_count
+        )
 
         self.stdout.write("Creating people...")
-        for _ in range(snippet_count):
-            Person.objects.create(
+        self.bulk_create_snippets(
+            Person,
+            lambda: Person(
                 first_name=lorem_ipsum.words(1, common=False),
                 last_name=lorem_ipsum.words(1, common=False),
                 job_title=lorem_ipsum.words(1, common=False),
-                image=self.get_random_model(Image),
-            )
+                image_id=self.get_random_id(Image),
+            ),
+            snippet_count,
+        )
 
         self.stdout.write("Creating footer text...")
-        for _ in range(snippet_count):
-            FooterText.objects.create(body=self.fake_stream_field())
+        locale = Locale.get_default()
+        self.bulk_create_snippets(
+            FooterText,
+            lambda: FooterText(
+                body=self.make_rich_text(1),
+                locale=locale,
+                translation_key=self.make_uuid(),
+            ),
+            snippet_count,
+        )
+
+    def create_tags(self):
+        names = {
+            lorem_ipsum.words(1, common=False)
+            for _ in range(self.profile["tags"]["vocabulary"])
+        }
+        self.stdout.write("Creating tags...")
+        Tag.objects.bulk_create(
+            [Tag(name=name, slug=slugify(name)) for name in sorted(names)],
+            ignore_conflicts=True,
+        )
+
+    def create_embeds(self):
+        for url in EMBED_URLS:
+            Embed.objects.get_or_create(
+                hash=get_embed_hash(url),
+                defaults={
+                    "url": url,
+                    "type": "video",
+                    "html": f'<iframe width="200" height="113" src="{url}"></iframe>',
+                    "width": 200,
+                    "height": 113,
+                },
+            )
 
     def create_images(self, image_count):
-        image_files = list(FIXTURE_MEDIA_DIR.iterdir())
+        image_files = sorted(FIXTURE_MEDIA_DIR.iterdir())
+        images = [
+            (
+                str(random.choice(image_files)),
+                self.make_title(),
+                RANDOM_IMAGE_RENDITIONS,
+            )
+            for _ in range(image_count)
+        ]
 
         self.stdout.write("Creating images...")
-        for _ in range(image_count):
-            random_image = random.choice(image_files)
-            with random_image.open(mode="rb") as image_file:
-                willow_image = WillowImage.open(image_file)
-                width, height = willow_image.get_size()
-                image = Image.objects.create(
-                    title=self.make_title(),
-                    width=width,
-                    height=height,
-                    file_size=random_image.stat().st_size,
-                )
-                image_file.seek(0)
-                image.file.save(random_image.name, image_file)
+        if not self.bulk:
+            for image_path, title, renditions in images:
+                create_image(image_path, title)
+            return
+
+        workers = self.workers
+        if connections[DEFAULT_DB_ALIAS].vendor == "sqlite":
+            # SQLite only allows one writer at a time
+            workers = 1
+
+        started_at = time.monotonic()
+        if workers == 1:
+            for done, image in enumerate(images, start=1):
+                create_image(*image)
+                if done % self.batch_size == 0 or done == image_count:
+                    self.report_progress("images", done, image_count, started_at)
+            return
+
+        # Forked workers must not share the parent's connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+            for done, _ in enumerate(pool.map(create_image, *zip(*images)), start=1):
+                if done % self.batch_size == 0 or done == image_count:
+                    self.report_progress("images", done, image_count, started_at)
 
     def handle(self, **options):
+        self.bulk = options["bulk"]
+        self.batch_size = options["batch_size"]
+        self.workers = options["workers"]
+        self.candidate_ids = {}
+        self.parent_paths = set()
+        self.profile = self.load_profile(options["profile"])
+        if options["seed"] is not None:
+            # lorem_ipsum draws from the module level generator too
+            random.seed(options["seed"])
+
         self.create_images(options["image_count"])
         self.create_snippets(options["snippet_count"])
+        self.create_tags()
+        if self.profile["block_mix"].get("embed_block"):
+            self.create_embeds()
         self.create_pages(options["page_count"])
+
+        self.purge_caches()
+        if self.bulk:
+            # Bulk inserts don't send the signals that update the search index
+            self.stdout.write("Run update_index_incremental to index the new pages.")
+
+    def purge_caches(self):
+        """
+        Purges what the new content makes stale, as pages created live and
+        bulk inserts don't send the signals that do it: the listings and menus
+        of the pages that were given children, the full page cache, the footer
+        and the search caches.
+        """
+        paths = sorted(self.parent_paths)
+        purge_dependents(*[children_dependency(path) for path in paths])
+        purge_navigation_cache(*paths)
+        for path in paths:
+            purge_listing_counts(path)
+        cache.delete_many([CHILD_TAGS_CACHE_KEY.format(path) for path in paths])
+        purge_page_cache()
+        purge_footer_text_cache()
+        purge_search_results_cache()
+        bump_autocomplete_version()
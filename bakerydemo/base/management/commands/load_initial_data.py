@@ -38,8 +38,9 @@ class Command(BaseCommand):
             Page.objects.get(title="Welcome to your new Wagtail site!").delete()
 
         call_command("loaddata", fixture_file, verbosity=0)
-        call_command("update_index", verbosity=0)
-        call_command("rebuild_references_index", verbosity=0)
+        # Rebuilds the search and reference indexes, and records when it did so
+        # that later runs of update_index_incremental only pick up changes
+        call_command("update_index_incremental", full=True, verbosity=0)
 
         print(  # noqa: T201
             "Awesome. Your data is loaded! The bakery's doors are almost ready to open..."
@@ -0,0 +1,168 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from wagtail.models import ModelLogEntry, Page, ReferenceIndex
+from wagtail.search.backends import get_search_backends
+from wagtail.search.index import get_indexed_models
+
+from bakerydemo.base.models import IndexWatermark
+from bakerydemo.base.workers import init_worker
+
+# The time of the last successful run is kept in the database, see
+# `IndexWatermark`. Without it (e.g. on the first run) there is nothing to
+# compare against, and the whole site is reindexed with `update_index` and
+# `rebuild_references_index`.
+
+
+def index_chunk(model_label, pks):
+    """
+    Updates the search backends and the reference index for the objects of
+    `model_label` in `pks`. Runs in a worker process, with its own database
+    connection.
+    """
+    model = apps.get_model(model_label)
+    objects = list(model.get_indexed_objects().filter(pk__in=pks))
+    for backend in get_search_backends(with_auto_update=True):
+        backend.add_bulk(model, objects)
+    if ReferenceIndex.is_indexed(model):
+        with transaction.atomic():
+            for obj in objects:
+                ReferenceIndex.create_or_update_for_object(obj)
+    return len(objects)
+
+
+class Command(BaseCommand):
+    help = (
+        "Updates the search and reference indexes for the pages changed since "
+        "the last run, in parallel. Falls back to a full rebuild on the first run."
+    )
+
+    def write(self, message):
+        if self.verbosity > 0:
+            self.stdout.write(message)
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            type=datetime.fromisoformat,
+            help="Reindex objects changed since this ISO 8601 date and time, "
+            "rather than since the last run",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Rebuild the whole search and reference indexes",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="How many processes (and so database connections) to use",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="How many objects each process indexes at a time",
+        )
+
+    def get_changed_objects(self, since):
+        """
+        Returns a mapping of model label to the pks of its objects that changed
+        since `since`: pages that were edited or published, and other indexed
+        models that were edited or published (by their latest revision, their
+        publishing date or the admin's log of their edits, e.g. for images
+        whose file was replaced) or created since.
+        """
+        changed = {}
+        pages = Page.objects.filter(
+            Q(latest_revision_created_at__gte=since) | Q(last_published_at__gte=since)
+        ).values_list("content_type_id", "pk")
+        for content_type_id, pk in pages.iterator():
+            model = ContentType.objects.get_for_id(content_type_id).model_class()
+            if model is not None:
+                changed.setdefault(model._meta.label, []).append(pk)
+
+        for model in get_indexed_models():
+            if issubclass(model, Page):
+                continue
+            field_names = {field.name for field in model._meta.get_fields()}
+            filters = Q()
+            if "latest_revision" in field_names:
+                filters |= Q(latest_revision__created_at__gte=since)
+            if "last_published_at" in field_names:
+                filters |= Q(last_published_at__gte=since)
+            if "created_at" in field_names:
+                filters |= Q(created_at__gte=since)
+            if not filters:
+                self.write(f"Skipping {model._meta.label}, it has no change timestamp")
+                continue
+            edited = ModelLogEntry.objects.filter(
+                content_type=ContentType.objects.get_for_model(
+                    model, for_concrete_model=False
+                ),
+                timestamp__gte=since,
+            ).values_list("object_id", flat=True)
+            filters |= Q(pk__in=[model._meta.pk.to_python(pk) for pk in edited])
+            pks = model.objects.filter(filters).values_list("pk", flat=True)
+            if pks:
+                changed[model._meta.label] = list(pks)
+        return changed
+
+    def handle(self, **options):
+        self.verbosity = options["verbosity"]
+        started_at = timezone.now()
+        since = options["since"] or IndexWatermark.get_indexed_at()
+        if since is not None and timezone.is_naive(since):
+            since = timezone.make_aware(since)
+
+        if options["full"] or since is None:
+            self.write("Rebuilding the search and reference indexes...")
+            call_command("update_index", verbosity=options["verbosity"])
+            call_command("rebuild_references_index", verbosity=options["verbosity"])
+            IndexWatermark.set_indexed_at(started_at)
+            return
+
+        if options["workers"] < 1 or options["chunk_size"] < 1:
+            raise CommandError("--workers and --chunk-size must be at least 1")
+
+        self.write(f"Reindexing objects changed since {since.isoformat()}...")
+        timer = time.monotonic()
+        chunks = [
+            (model_label, pks[index : index + options["chunk_size"]])
+            for model_label, pks in self.get_changed_objects(since).items()
+            for index in range(0, len(pks), options["chunk_size"])
+        ]
+
+        workers = options["workers"]
+        if connections[DEFAULT_DB_ALIAS].vendor == "sqlite":
+            # SQLite only allows one writer at a time
+            workers = 1
+
+        indexed = 0
+        if workers == 1 or len(chunks) <= 1:
+            for chunk in chunks:
+                indexed += index_chunk(*chunk)
+        else:
+            # Forked workers must not share the parent's connections
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=init_worker
+            ) as executor:
+                for count in executor.map(index_chunk, *zip(*chunks)):
+                    indexed += count
+
+        elapsed = time.monotonic() - timer
+        IndexWatermark.set_indexed_at(started_at)
+        self.write(
+            f"Indexed {indexed} objects in {len(chunks)} chunks in {elapsed:.1f}s "
+            f"({indexed / elapsed if elapsed else 0:.0f} objects/s)"
+        )
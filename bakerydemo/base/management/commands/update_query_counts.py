@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+
+from bakerydemo.base.query_counts import (
+    QUERY_COUNTS_BASELINE,
+    count_queries,
+    demo_content,
+    get_query_count_urls,
+    save_baseline,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Records the number of queries each page type, API endpoint and the "
+        "search view make with the demo content, with cold and warm caches, as "
+        "the baseline for the query count tests. Uses a test database, like "
+        "the tests do."
+    )
+
+    def handle(self, **options):
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with demo_content():
+                client = Client()
+                counts = {}
+                for name, url in get_query_count_urls().items():
+                    status_code, counts[name] = count_queries(client, url)
+                    if status_code != 200:
+                        raise CommandError(f"{url} returned {status_code}")
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        save_baseline(counts)
+        for name, queries in sorted(counts.items()):
+            self.stdout.write(f"{name}: {queries['cold']} cold, {queries['warm']} warm")
+        self.stdout.write(f"Wrote {QUERY_COUNTS_BASELINE}")
@@ -0,0 +1,288 @@
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.template.backends.django import Template
+
+from .sites import site_root_cache
+
+logger = logging.getLogger(__name__)
+
+# Per-request performance metrics, recorded by MetricsMiddleware and exposed
+# in the Prometheus text format by the `metrics` view. For each request it
+# records the total time, the number and time of database queries, cache hits
+# and misses, and the time spent rendering templates. Requests are labelled
+# with the type of page served (e.g. "BreadPage") or otherwise the name of
+# the view. Each process keeps its own totals.
+#
+# Budgets can be set per label in PERFORMANCE_BUDGETS, with "default" for
+# the others, e.g. {"BreadsIndexPage": {"queries": 50, "duration": 0.5}}.
+# The limits are "queries", and "duration", "db_time" and "template_time" in
+# seconds. Requests over budget are logged with the queries they repeated
+# most, which is usually where an N+1 is.
+REQUEST_DURATION_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+TOP_REPEATED_QUERIES = 5
+
+current_metrics = ContextVar("current_metrics", default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template_time = 0
+        self.sql = Counter()
+        # Set while inside a cache call or a template render, so that the
+        # calls and renders they make themselves aren't counted twice
+        self.in_cache_call = False
+        self.rendering = False
+
+    def record_query(self, execute, sql, params, many, context):
+        started_at = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started_at
+            self.queries += 1
+            self.sql[sql] += 1
+
+    def get_values(self, duration):
+        return {
+            "duration": duration,
+            "queries": self.queries,
+            "db_time": self.db_time,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "template_time": self.template_time,
+        }
+
+
+@contextmanager
+def collect_metrics():
+    """
+    Collects the metrics of the queries, cache lookups and template renders
+    inside the block into the `RequestMetrics` it yields.
+    """
+    metrics = RequestMetrics()
+    token = current_metrics.set(metrics)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics.record_query))
+            yield metrics
+    finally:
+        current_metrics.reset(token)
+
+
+def instrument_cache_get(get):
+    _missing = object()
+
+    @wraps(get)
+    # Other arguments are passed on, e.g. django-redis's `client`
+    def instrumented_get(self, key, default=None, *args, **kwargs):
+        metrics = current_metrics.get()
+        if metrics is None or metrics.in_cache_call:
+            return get(self, key, default, *args, **kwargs)
+        metrics.in_cache_call = True
+        try:
+            value = get(self, key, _missing, *args, **kwargs)
+        finally:
+            metrics.in_cache_call = False
+        if value is _missing:
+            metrics.cache_misses += 1
+            return default
+        metrics.cache_hits += 1
+        return value
+
+    instrumented_get.instrumented = True
+    return instrumented_get
+
+
+def instrument_cache_get_many(get_many):
+    @wraps(get_many)
+    def instrumented_get_many(self, keys, *args, **kwargs):
+        metrics = current_metrics.get()
+        if metrics is None or metrics.in_cache_call:
+            return get_many(self, keys, *args, **kwargs)
+        keys = list(keys)
+        metrics.in_cache_call = True
+        try:
+            values = get_many(self, keys, *args, **kwargs)
+        finally:
+            metrics.in_cache_call = False
+        metrics.cache_hits += len(values)
+        metrics.cache_misses += len(keys) - len(values)
+        return values
+
+    instrumented_get_many.instrumented = True
+    return instrumented_get_many
+
+
+def instrument_template_render(render):
+    @wraps(render)
+    def instrumented_render(self, context=None, request=None):
+        metrics = current_metrics.get()
+        if metrics is None or metrics.rendering:
+            return render(self, context, request)
+        metrics.rendering = True
+        started_at = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - started_at
+            metrics.rendering = False
+
+    instrumented_render.instrumented = True
+    return instrumented_render
+
+
+def install_instrumentation():
+    """
+    Wraps the cache backends' lookups and Django template rendering, which
+    have no hooks of their own. The wrappers only record anything inside
+    `collect_metrics`.
+    """
+    for alias in settings.CACHES:
+        backend = type(caches[alias])
+        if not getattr(backend.get, "instrumented", False):
+            backend.get = instrument_cache_get(backend.get)
+        if not getattr(backend.get_many, "instrumented", False):
+            backend.get_many = instrument_cache_get_many(backend.get_many)
+    if not getattr(Template.render, "instrumented", False):
+        Template.render = instrument_template_render(Template.render)
+
+
+def get_request_label(request):
+    # Set to the type of page by the before_serve_page hook in wagtail_hooks.py
+    label = getattr(request, "metrics_label", None)
+    if label is None and request.resolver_match is not None:
+        label = request.resolver_match.view_name
+    return label or "unresolved"
+
+
+def check_budget(label, metrics, values):
+    budgets = getattr(settings, "PERFORMANCE_BUDGETS", {})
+    budget = budgets.get(label, budgets.get("default", {}))
+    exceeded = [
+        f"{name} {values[name]:.3g} > {limit}"
+        for name, limit in budget.items()
+        if values.get(name, 0) > limit
+    ]
+    if exceeded:
+        logger.warning(
+            "%s is over budget: %s. Most repeated queries:\n%s",
+            label,
+            ", ".join(exceeded),
+            "\n".join(
+                f"{count} x {sql}"
+                for sql, count in metrics.sql.most_common(TOP_REPEATED_QUERIES)
+            ),
+        )
+    return bool(exceeded)
+
+
+class MetricsRegistry:
+    """
+    The totals of the metrics of this process, per label.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals = {}
+
+    def record(self, label, values, over_budget=False):
+        with self.lock:
+            totals = self.totals.setdefault(
+                label,
+                {
+                    "requests": 0,
+                    "over_budget": 0,
+                    "buckets": [0] * len(REQUEST_DURATION_BUCKETS),
+                    **{name: 0 for name in values},
+                },
+            )
+            totals["requests"] += 1
+            totals["over_budget"] += over_budget
+            for name, value in values.items():
+                totals[name] += value
+            for index, bucket in enumerate(REQUEST_DURATION_BUCKETS):
+                if values["duration"] <= bucket:
+                    totals["buckets"][index] += 1
+
+    def render(self):
+        with self.lock:
+            totals = {
+                label: {**values, "buckets": list(values["buckets"])}
+                for label, values in self.totals.items()
+            }
+
+        lines = [
+            "# HELP bakerydemo_request_duration_seconds Time to handle requests.",
+            "# TYPE bakerydemo_request_duration_seconds histogram",
+        ]
+        for label, values in sorted(totals.items()):
+            for bucket, count in zip(REQUEST_DURATION_BUCKETS, values["buckets"]):
+                lines.append(
+                    "bakerydemo_request_duration_seconds_bucket"
+                    f'{{view="{label}",le="{bucket}"}} {count}'
+                )
+            lines += [
+                "bakerydemo_request_duration_seconds_bucket"
+                f'{{view="{label}",le="+Inf"}} {values["requests"]}',
+                f'bakerydemo_request_duration_seconds_sum{{view="{label}"}} '
+                f'{values["duration"]}',
+                f'bakerydemo_request_duration_seconds_count{{view="{label}"}} '
+                f'{values["requests"]}',
+            ]
+
+        for name, key, description in [
+            ("db_queries_total", "queries", "Database queries made."),
+            ("db_query_duration_seconds_total", "db_time", "Time spent in queries."),
+            ("cache_hits_total", "cache_hits", "Cache lookups that hit."),
+            ("cache_misses_total", "cache_misses", "Cache lookups that missed."),
+            (
+                "template_render_duration_seconds_total",
+                "template_time",
+                "Time spent rendering templates.",
+            ),
+            ("over_budget_total", "over_budget", "Requests over their budget."),
+        ]:
+            lines += [
+                f"# HELP bakerydemo_{name} {description}",
+                f"# TYPE bakerydemo_{name} counter",
+            ]
+            lines += [
+                f'bakerydemo_{name}{{view="{label}"}} {values[key]}'
+                for label, values in sorted(totals.items())
+            ]
+
+        # The per-process cache of sites and their root pages, see sites.py
+        lines += [
+            "# HELP bakerydemo_site_root_cache_hits_total Site lookups served from "
+            "the process cache.",
+            "# TYPE bakerydemo_site_root_cache_hits_total counter",
+            f"bakerydemo_site_root_cache_hits_total {site_root_cache.hits}",
+            "# HELP bakerydemo_site_root_cache_misses_total Site lookups that "
+            "queried the database.",
+            "# TYPE bakerydemo_site_root_cache_misses_total counter",
+            f"bakerydemo_site_root_cache_misses_total {site_root_cache.misses}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+
+def record_request(request, metrics, duration):
+    label = get_request_label(request)
+    values = metrics.get_values(duration)
+    metrics_registry.record(label, values, check_budget(label, metrics, values))
@@ -0,0 +1,122 @@
+import time
+
+from django.core.cache import cache
+from django.urls import Resolver404, resolve
+
+from . import metrics, page_cache
+from .dependencies import collect_dependencies, get_dependency_versions, is_current
+from .sites import get_site_and_root_page
+
+
+class MetricsMiddleware:
+    """
+    Records the performance metrics of each request, see base/metrics.py.
+    Needs to come first, to include the time spent in the other middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        metrics.install_instrumentation()
+
+    def __call__(self, request):
+        started_at = time.perf_counter()
+        with metrics.collect_metrics() as request_metrics:
+            response = self.get_response(request)
+        metrics.record_request(
+            request, request_metrics, time.perf_counter() - started_at
+        )
+        return response
+
+
+class SiteRootCacheMiddleware:
+    """
+    Resolves the site for each request from the per-process site cache before
+    anything else (Wagtail's redirects and page serving included) looks it up.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        get_site_and_root_page(request)
+        return self.get_response(request)
+
+
+class PageCacheMiddleware:
+    """
+    Serves anonymous requests for Wagtail pages from the full page cache, see
+    base/page_cache.py. Pages are only stored when their type opts in with
+    `page_cache_enabled`, which is checked by the `before_serve_page` hook in
+    wagtail_hooks.py.
+
+    Needs to come after the session, authentication and message middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def should_use_cache(self, request):
+        return (
+            request.method in ("GET", "HEAD")
+            and not request.user.is_authenticated
+            and not getattr(request, "is_preview", False)
+            # Flash messages are personal, and shown on the next page rendered
+            and "messages" not in request.COOKIES
+            and resolve(request.path_info).url_name == "wagtail_serve"
+        )
+
+    def __call__(self, request):
+        try:
+            use_cache = self.should_use_cache(request)
+        except Resolver404:
+            use_cache = False
+        if not use_cache:
+            return self.get_response(request)
+
+        site = get_site_and_root_page(request)[0]
+        key = page_cache.get_page_cache_key(request, site)
+        generation = page_cache.get_page_cache_generation()
+        entry = cache.get(key)
+
+        if entry is not None:
+            if page_cache.is_fresh(entry, generation) and is_current(
+                entry.get("versions")
+            ):
+                request.metrics_label = entry.get("metrics_label")
+                response = page_cache.build_response(entry)
+                response["X-Page-Cache"] = "hit"
+                return response
+            if not page_cache.acquire_render_lock(key):
+                request.metrics_label = entry.get("metrics_label")
+                response = page_cache.build_response(entry)
+                response["X-Page-Cache"] = "stale"
+                return response
+            try:
+                return self.render(request, key, generation, entry)
+            finally:
+                page_cache.release_render_lock(key)
+
+        return self.render(request, key, generation)
+
+    def render(self, request, key, generation, entry=None):
+        # Set to True by the before_serve_page hook if the page opts in
+        request.page_cache_enabled = False
+        # The page most likely depends on the same content as last time. Its
+        # versions are read before rendering, so that the entry isn't stored
+        # as current if the content changes while it renders.
+        snapshot = None
+        if entry is not None and entry.get("versions"):
+            snapshot = get_dependency_versions(entry["versions"])
+        with collect_dependencies(snapshot) as versions:
+            response = self.get_response(request)
+        if request.page_cache_enabled:
+            if page_cache.is_response_cacheable(response):
+                page_cache.store_response(
+                    key,
+                    response,
+                    generation,
+                    versions,
+                    getattr(request, "metrics_label", None),
+                )
+            response["X-Page-Cache"] = "miss"
+        return response
@@ -35,6 +35,17 @@ from wagtail.models import (
 from wagtail.search import index
 
 from .blocks import BaseStreamBlock
+from .fragments import prefetch_page_fragments
+from .renditions import (
+    HERO_RENDITIONS,
+    LISTING_CARD_RENDITIONS,
+    LOCATION_CARD_RENDITIONS,
+    PORTRAIT_PICTURE_CARD_RENDITIONS,
+    PROMO_RENDITIONS,
+    RenditionBatch,
+    load_images,
+    prefetch_renditions,
+)
 
 
 class Person(
@@ -393,6 +404,69 @@ class HomePage(Page):
         ),
     ]
 
+    # Served to anonymous visitors from the full page cache when
+    # PageCacheMiddleware is enabled, see base/page_cache.py
+    page_cache_enabled = True
+
+    def get_featured_pages(self, section, count):
+        # The first `count` children of a featured section, if its type lists
+        # them with a `children` method
+        if section is None or not hasattr(section.specific, "children"):
+            return []
+        return list(section.specific.children()[:count])
+
+    def get_context(self, request):
+        context = super().get_context(request)
+        sections = [
+            # Context variable, section, number of cards, card template and
+            # what it varies on, and the card's renditions
+            (
+                "featured_section_1_pages",
+                self.featured_section_1,
+                3,
+                ("listing-card", []),
+                LISTING_CARD_RENDITIONS,
+            ),
+            (
+                "featured_section_2_pages",
+                self.featured_section_2,
+                3,
+                ("location-card", []),
+                LOCATION_CARD_RENDITIONS,
+            ),
+            (
+                "featured_section_3_pages",
+                self.featured_section_3,
+                6,
+                ("picture-card", [True]),
+                PORTRAIT_PICTURE_CARD_RENDITIONS,
+            ),
+        ]
+
+        # The cards are looked up in the cache in one go. The images of those
+        # that need rendering are loaded with one query, along with the hero
+        # and promo images, and their renditions with one lookup per section.
+        uncached_pages = {}
+        for name, section, count, (fragment_name, vary_on), filter_spec in sections:
+            context[name] = self.get_featured_pages(section, count)
+            uncached_pages[name] = prefetch_page_fragments(
+                fragment_name, context[name], request, vary_on
+            )
+        load_images(
+            [self, *(page for pages in uncached_pages.values() for page in pages)],
+            "image",
+            "promo_image",
+        )
+        RenditionBatch().add([self.image], HERO_RENDITIONS).add(
+            [self.promo_image], PROMO_RENDITIONS
+        )
+        for name, section, count, fragment, filter_spec in sections:
+            prefetch_renditions(
+                [getattr(page, "image", None) for page in uncached_pages[name]],
+                filter_spec,
+            )
+        return context
+
     def __str__(self):
         return self.title
 
@@ -573,3 +647,22 @@ class UserApprovalTask(Task):
     @classmethod
     def get_description(cls):
         return _("Only a specific user can approve this task")
+
+
+class IndexWatermark(models.Model):
+    """
+    The time of the last successful run of `update_index_incremental`, kept in
+    a single row so that it survives the cache being cleared, and is shared by
+    every server.
+    """
+
+    indexed_at = models.DateTimeField()
+
+    @classmethod
+    def get_indexed_at(cls):
+        watermark = cls.objects.filter(pk=1).first()
+        return watermark.indexed_at if watermark else None
+
+    @classmethod
+    def set_indexed_at(cls, indexed_at):
+        cls.objects.update_or_create(pk=1, defaults={"indexed_at": indexed_at})
@@ -0,0 +1,108 @@
+from collections import namedtuple
+
+from django.core.cache import cache
+from wagtail.models import Page
+
+from .dependencies import page_dependency, track_dependencies
+
+# The menu tree of a site is cached under the materialized path of its root
+# page. Root pages are per site and per locale, so this gives us one entry for
+# each of them, and lets us find every tree a page belongs to with nothing but
+# string slicing on its own path.
+NAVIGATION_CACHE_KEY = "bakerydemo:navigation:{}"
+NAVIGATION_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Breadcrumbs are cached per page, again under its materialized path, so the
+# ancestors of any page are found by slicing its path into prefixes.
+BREADCRUMB_CACHE_KEY = "bakerydemo:breadcrumb:{}"
+BREADCRUMB_CACHE_TIMEOUT = 60 * 60 * 24
+
+Breadcrumb = namedtuple("Breadcrumb", ["title", "url"])
+
+
+def build_navigation_tree(root):
+    """
+    Returns a dict mapping the `path` of `root` and of each of its live,
+    in-menu descendants to the list of their own live, in-menu children.
+    The whole tree is loaded with a single query.
+    """
+    tree = {root.path: []}
+    pages = Page.objects.descendant_of(root).live().in_menu().order_by("path")
+    for page in pages:
+        parent_path = page.path[: -Page.steplen]
+        # Ordering by path guarantees a parent is seen before its children, so
+        # pages whose parent isn't itself shown in the menu are skipped.
+        if parent_path in tree:
+            tree[parent_path].append(page)
+            tree[page.path] = []
+    return tree
+
+
+def get_navigation_tree(root):
+    key = NAVIGATION_CACHE_KEY.format(root.path)
+    tree = cache.get(key)
+    if tree is None:
+        tree = build_navigation_tree(root)
+        cache.set(key, tree, NAVIGATION_CACHE_TIMEOUT)
+    return tree
+
+
+def is_in_navigation(page):
+    """
+    Returns whether `page` is shown in the menus, or was the last time they
+    were cached.
+    """
+    if page.show_in_menus:
+        return True
+    keys = [
+        NAVIGATION_CACHE_KEY.format(page.path[:length])
+        for length in range(Page.steplen, len(page.path), Page.steplen)
+    ]
+    return any(page.path in tree for tree in cache.get_many(keys).values())
+
+
+def purge_navigation_cache(*paths):
+    """
+    Deletes the cached menu tree of every ancestor of the given page paths,
+    including the pages themselves.
+    """
+    keys = {
+        NAVIGATION_CACHE_KEY.format(path[:length])
+        for path in paths
+        for length in range(Page.steplen, len(path) + 1, Page.steplen)
+    }
+    cache.delete_many(keys)
+
+
+def get_breadcrumbs(page, request=None):
+    """
+    Returns a `Breadcrumb` for each ancestor of `page` below the root of the
+    page tree, followed by one for `page` itself. Ancestors missing from the
+    cache are loaded with a single query, so in the steady state this doesn't
+    touch the database at all.
+    """
+    paths = [
+        page.path[:length]
+        for length in range(2 * Page.steplen, len(page.path), Page.steplen)
+    ]
+    keys = {path: BREADCRUMB_CACHE_KEY.format(path) for path in paths}
+    breadcrumbs = cache.get_many(keys.values())
+
+    missing = [path for path in paths if keys[path] not in breadcrumbs]
+    if missing:
+        found = {
+            keys[ancestor.path]: Breadcrumb(ancestor.title, ancestor.get_url(request))
+            for ancestor in Page.objects.filter(path__in=missing)
+        }
+        cache.set_many(found, BREADCRUMB_CACHE_TIMEOUT)
+        breadcrumbs.update(found)
+
+    track_dependencies(*[page_dependency(path) for path in paths])
+
+    return [breadcrumbs[keys[path]] for path in paths if keys[path] in breadcrumbs] + [
+        Breadcrumb(page.title, page.get_url(request))
+    ]
+
+
+def purge_breadcrumb_cache(*paths):
+    cache.delete_many([BREADCRUMB_CACHE_KEY.format(path) for path in paths])
@@ -0,0 +1,107 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import translation
+from django.utils.http import urlencode
+
+# Rendered responses of the page types that opt in with `page_cache_enabled`
+# are cached for anonymous visitors. Entries record the versions of the content
+# they were rendered from (see base/dependencies.py), and are stale once it
+# changes.
+# Every entry also records the generation it was rendered in; bumping the
+# generation invalidates all of them at once, for changes that show on every
+# page such as the menus or the footer.
+PAGE_CACHE_KEY = "bakerydemo:page:{site_id}:{language}:{path}?{query}"
+PAGE_CACHE_LOCK_KEY = "bakerydemo:page_lock:{}"
+PAGE_CACHE_GENERATION_KEY = "bakerydemo:page_generation"
+
+# Only these query string parameters change what the cached pages render
+PAGE_CACHE_QUERY_PARAMS = ["page", "tag", "after", "before"]
+
+
+def get_page_cache_timeout():
+    return getattr(settings, "PAGE_CACHE_TIMEOUT", 5 * 60)
+
+
+def get_page_cache_stale_timeout():
+    # How long an expired entry may still be served while a single request
+    # renders its replacement
+    return getattr(settings, "PAGE_CACHE_STALE_TIMEOUT", 60)
+
+
+def get_page_cache_key(request, site):
+    query = urlencode(
+        [
+            (param, request.GET[param])
+            for param in PAGE_CACHE_QUERY_PARAMS
+            if param in request.GET
+        ]
+    )
+    return PAGE_CACHE_KEY.format(
+        site_id=site.pk if site else None,
+        language=translation.get_language(),
+        path=request.path,
+        query=query,
+    )
+
+
+def get_page_cache_generation():
+    return cache.get(PAGE_CACHE_GENERATION_KEY, 0)
+
+
+def purge_page_cache():
+    try:
+        cache.incr(PAGE_CACHE_GENERATION_KEY)
+    except ValueError:
+        cache.set(PAGE_CACHE_GENERATION_KEY, 1, None)
+
+
+def is_response_cacheable(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and "private" not in response.get("Cache-Control", "")
+        and "no-cache" not in response.get("Cache-Control", "")
+    )
+
+
+def store_response(key, response, generation, versions, metrics_label=None):
+    entry = {
+        "content": response.content,
+        "headers": list(response.items()),
+        "generation": generation,
+        # Of the content it was rendered from, see base/dependencies.py
+        "versions": versions,
+        # The type of page, for requests served from the entry to be recorded
+        # under, see base/metrics.py
+        "metrics_label": metrics_label,
+        "created_at": time.time(),
+    }
+    cache.set(key, entry, get_page_cache_timeout() + get_page_cache_stale_timeout())
+
+
+def build_response(entry):
+    response = HttpResponse(entry["content"])
+    for header, value in entry["headers"]:
+        response[header] = value
+    return response
+
+
+def is_fresh(entry, generation):
+    return (
+        entry["generation"] == generation
+        and time.time() - entry["created_at"] < get_page_cache_timeout()
+    )
+
+
+def acquire_render_lock(key):
+    # Only one request gets to re-render an entry, the others keep serving the
+    # stale copy in the meantime
+    return cache.add(PAGE_CACHE_LOCK_KEY.format(key), 1, 30)
+
+
+def release_render_lock(key):
+    cache.delete(PAGE_CACHE_LOCK_KEY.format(key))
@@ -0,0 +1,211 @@
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+
+# Listings can be paged with opaque `?after=` / `?before=` cursors instead of
+# page numbers. A cursor holds the ordering values of the last (or first) item
+# on the current page, so the next page is found with an indexed range query
+# rather than an ever growing OFFSET, and no COUNT(*) is needed. Page number
+# URLs (`?page=`) keep working alongside them.
+CURSOR_SALT = "bakerydemo.pagination"
+CURSOR_PARAMS = ["after", "before"]
+
+
+def is_cursor_pagination(request):
+    # Cursor mode is used when a cursor is requested, or for listings without a
+    # page number when KEYSET_PAGINATION is on
+    if any(param in request.GET for param in CURSOR_PARAMS):
+        return True
+    return getattr(settings, "KEYSET_PAGINATION", False) and "page" not in request.GET
+
+
+def encode_cursor(values):
+    return signing.dumps(
+        [
+            value.isoformat() if hasattr(value, "isoformat") else value
+            for value in values
+        ],
+        salt=CURSOR_SALT,
+        compress=True,
+    )
+
+
+def decode_cursor(token):
+    # Tampered or outdated cursors start again from the first page
+    try:
+        values = signing.loads(token, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        return None
+    return values if isinstance(values, list) else None
+
+
+class CursorPage(Sequence):
+    """
+    A page of a cursor paginated listing. It can be used in templates like a
+    `django.core.paginator.Page`, but only knows about its neighbours.
+    """
+
+    paginator = None
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<CursorPage of {len(self)} items>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Pages through a queryset by the values of its ordering fields, e.g.
+    `("-first_published_at", "-id")`. The last field needs to be unique so
+    that every item has a distinct position.
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = ordering
+
+    def get_keyset_filter(self, values, reverse=False):
+        # (a, b) > (x, y) is written as a > x OR (a = x AND b > y), which
+        # works on every database and can use an index on the fields
+        keyset_filter = Q()
+        for index, field in enumerate(self.ordering):
+            descending = field.startswith("-")
+            lookup = "lt" if descending != reverse else "gt"
+            condition = Q(**{f"{field.lstrip('-')}__{lookup}": values[index]})
+            for previous_field, value in zip(self.ordering[:index], values):
+                condition &= Q(**{previous_field.lstrip("-"): value})
+            keyset_filter |= condition
+        return keyset_filter
+
+    def get_cursor(self, obj):
+        return encode_cursor(
+            [getattr(obj, field.lstrip("-")) for field in self.ordering]
+        )
+
+    def page(self, after=None, before=None):
+        after = decode_cursor(after) if after else None
+        before = decode_cursor(before) if before else None
+
+        if before and len(before) == len(self.ordering):
+            # Walk backwards from the cursor and put the page back in order
+            reversed_ordering = [
+                field.lstrip("-") if field.startswith("-") else f"-{field}"
+                for field in self.ordering
+            ]
+            items = list(
+                self.queryset.filter(
+                    self.get_keyset_filter(before, reverse=True)
+                ).order_by(*reversed_ordering)[: self.per_page + 1]
+            )
+            has_previous = len(items) > self.per_page
+            items = items[: self.per_page][::-1]
+            has_next = True
+        else:
+            queryset = self.queryset.order_by(*self.ordering)
+            if after and len(after) == len(self.ordering):
+                queryset = queryset.filter(self.get_keyset_filter(after))
+            items = list(queryset[: self.per_page + 1])
+            has_next = len(items) > self.per_page
+            items = items[: self.per_page]
+            has_previous = bool(after)
+
+        return CursorPage(
+            items,
+            next_cursor=self.get_cursor(items[-1]) if has_next and items else None,
+            previous_cursor=(
+                self.get_cursor(items[0]) if has_previous and items else None
+            ),
+        )
+
+
+class RankedKeysetPaginator:
+    """
+    Pages through search results in the order of their ranking. Cursors hold
+    the rank and id of an item: the rank slices the results straight to the
+    page, and the id checks that the ranking hasn't changed since, finding the
+    item again if it has. Only the results being shown are loaded.
+
+    The results need an `index(pk)` method that returns the rank of an item
+    by its id, like search/results.py's CachedSearchResults.
+    """
+
+    def __init__(self, results, per_page):
+        self.results = results
+        self.per_page = per_page
+
+    def get_cursor(self, rank, obj):
+        return encode_cursor([rank, obj.pk])
+
+    def find_rank(self, pk):
+        # Only needed when the ranking has changed under a cursor
+        try:
+            return self.results.index(pk)
+        except ValueError:
+            return None
+
+    def page(self, after=None, before=None, relocated=False):
+        cursor = decode_cursor(before or after) if before or after else None
+        if cursor and len(cursor) == 2 and isinstance(cursor[0], int):
+            rank, pk = cursor
+        else:
+            rank = pk = None
+
+        # Load the page along with the item the cursor points at
+        if rank is None:
+            start, stop = 0, self.per_page + 1
+        elif before:
+            start, stop = max(rank - self.per_page, 0), rank + 1
+        else:
+            start, stop = rank, rank + self.per_page + 2
+        window = list(self.results[start:stop])
+
+        if rank is not None:
+            offset = rank - start
+            if offset < 0 or offset >= len(window) or window[offset].pk != pk:
+                rank = None if relocated else self.find_rank(pk)
+                cursor = encode_cursor([rank, pk]) if rank is not None else None
+                if before:
+                    return self.page(before=cursor, relocated=True)
+                return self.page(after=cursor, relocated=True)
+            del window[offset]
+
+        if rank is not None and before:
+            items = window
+            has_next = True
+        else:
+            start = rank + 1 if rank is not None else 0
+            items = window[: self.per_page]
+            has_next = len(window) > self.per_page
+
+        return CursorPage(
+            items,
+            next_cursor=(
+                self.get_cursor(start + len(items) - 1, items[-1])
+                if has_next and items
+                else None
+            ),
+            previous_cursor=self.get_cursor(start, items[0])
+            if start and items
+            else None,
+        )
@@ -0,0 +1,90 @@
+import json
+import tempfile
+from contextlib import contextmanager, redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from wagtail.documents import get_document_model
+from wagtail.images import get_image_model
+from wagtail.models import Page, Site
+
+# The most queries each page type, API endpoint and the search view may make
+# with the demo content, with cold and with warm caches. Checked by
+# tests/test_query_counts.py, and regenerated with
+# `./manage.py update_query_counts` after a change that is meant to alter them.
+QUERY_COUNTS_BASELINE = Path(__file__).parent / "tests" / "query_counts.json"
+
+QUERY_COUNTS_SEARCH_QUERY = "bread"
+
+
+@contextmanager
+def demo_content():
+    """
+    Loads the demo content into the current (test) database, with its media
+    in a temporary MEDIA_ROOT.
+    """
+    with tempfile.TemporaryDirectory() as media_root:
+        with override_settings(MEDIA_ROOT=media_root):
+            with redirect_stdout(StringIO()):
+                call_command("load_initial_data")
+            yield
+
+
+def get_query_count_urls():
+    """
+    Returns the URLs to count the queries of by name: the first live page of
+    each type, keyed by model label, the search view and the API endpoints.
+    """
+    urls = {}
+    for page in Page.objects.live().filter(depth__gt=1).order_by("path").specific():
+        urls.setdefault(page._meta.label, page.url)
+
+    urls["search"] = f"/search/?q={QUERY_COUNTS_SEARCH_QUERY}"
+    urls["api:pages"] = "/api/v2/pages/"
+    urls["api:pages:detail"] = "/api/v2/pages/{}/".format(
+        Site.objects.get(is_default_site=True).root_page_id
+    )
+    urls["api:images"] = "/api/v2/images/"
+    image = get_image_model().objects.order_by("pk").first()
+    if image:
+        urls["api:images:detail"] = f"/api/v2/images/{image.pk}/"
+    urls["api:documents"] = "/api/v2/documents/"
+    document = get_document_model().objects.order_by("pk").first()
+    if document:
+        urls["api:documents:detail"] = f"/api/v2/documents/{document.pk}/"
+    return urls
+
+
+def count_queries(client, url):
+    """
+    Returns the status code of a request to `url`, and the number of queries
+    it makes with cold and with warm caches as {"cold": ..., "warm": ...}.
+    The renditions it uses are generated by a first request, and the caches
+    cleared after it, so that the counts don't depend on what was requested
+    before.
+    """
+    client.get(url)
+    cache.clear()
+    counts = {}
+    for name in ["cold", "warm"]:
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        if response.status_code != 200:
+            break
+        counts[name] = len(queries)
+    return response.status_code, counts
+
+
+def load_baseline():
+    with QUERY_COUNTS_BASELINE.open() as f:
+        return json.load(f)
+
+
+def save_baseline(counts):
+    with QUERY_COUNTS_BASELINE.open("w") as f:
+        json.dump(counts, f, indent=2, sort_keys=True)
+        f.write("\n")
@@ -0,0 +1,314 @@
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, transaction
+from wagtail.images import get_image_model
+from wagtail.images.models import Filter
+from wagtail.models import ReferenceIndex
+
+logger = logging.getLogger(__name__)
+
+# The filter specs of the {% picture %} tags of the templates, for the views
+# to fetch the renditions of in advance and for the renditions to be generated
+# in the background. They need to match the templates.
+HERO_RENDITIONS = "format-{avif,webp,jpeg} fill-{800x650,1920x900}"
+HEADER_RENDITIONS = "format-{avif,webp,jpeg} fill-{800x650,1920x600}"
+PROMO_RENDITIONS = "format-{avif,webp,jpeg} fill-590x413-c100"
+LISTING_CARD_RENDITIONS = "format-{avif,webp,jpeg} fill-180x180-c100"
+BLOG_LISTING_CARD_RENDITIONS = "format-{avif,webp,jpeg} fill-322x247-c100"
+LOCATION_CARD_RENDITIONS = "format-{avif,webp,jpeg} fill-{300x320-c100,430x320-c100}"
+PORTRAIT_PICTURE_CARD_RENDITIONS = (
+    "format-{avif,webp,jpeg} fill-{250x320-c100,433x487-c100}"
+)
+# Also the gallery's
+PICTURE_CARD_RENDITIONS = "format-{avif,webp,jpeg} fill-{300x200-c75,645x480-c75}"
+IMAGE_BLOCK_RENDITIONS = "format-{avif,webp,jpeg} fill-{400x220,600x338}"
+
+# The renditions generated in the background for new images, so that the
+# first visitors after they are used don't wait for them to be encoded
+UPLOADED_IMAGE_RENDITIONS = [
+    HERO_RENDITIONS,
+    LISTING_CARD_RENDITIONS,
+    BLOG_LISTING_CARD_RENDITIONS,
+    PROMO_RENDITIONS,
+    PICTURE_CARD_RENDITIONS,
+]
+
+# The renditions generated in the background for the images of a page when
+# it's published, by page type and the field the images are in, as recorded
+# by the reference index. The defaults are added for every type: pages show
+# their image in the search results, and the image blocks of their body.
+PAGE_IMAGE_RENDITIONS = {
+    "base.HomePage": {"image": [HERO_RENDITIONS], "promo_image": [PROMO_RENDITIONS]},
+    "base.StandardPage": {"image": [HEADER_RENDITIONS]},
+    "base.GalleryPage": {"image": [HEADER_RENDITIONS]},
+    "blog.BlogPage": {
+        "image": [
+            HEADER_RENDITIONS,
+            BLOG_LISTING_CARD_RENDITIONS,
+            PORTRAIT_PICTURE_CARD_RENDITIONS,
+        ]
+    },
+    "breads.BreadPage": {"image": [HEADER_RENDITIONS]},
+    "locations.LocationPage": {
+        "image": [
+            HEADER_RENDITIONS,
+            LOCATION_CARD_RENDITIONS,
+            PICTURE_CARD_RENDITIONS,
+        ]
+    },
+    "recipes.RecipePage": {"image": [HEADER_RENDITIONS]},
+}
+DEFAULT_PAGE_IMAGE_RENDITIONS = {
+    "image": [LISTING_CARD_RENDITIONS],
+    "body.image_block.image": [IMAGE_BLOCK_RENDITIONS],
+}
+
+
+class RenditionBatch:
+    """
+    The renditions of several images, which are looked up together the first
+    time the template asks for one of them: in the `renditions` cache with a
+    single lookup, then in the database with a single query, and generated
+    only if they don't exist yet.
+
+    The images are given a `prefetched_renditions` that Wagtail reads from
+    instead of looking up each image's renditions itself. Like with Wagtail's
+    `prefetch_renditions()`, the images are then expected to be rendered with
+    the filter specs they were added with only.
+    """
+
+    def __init__(self):
+        self.images = {}
+        self.filters = defaultdict(dict)
+        self.renditions = None
+
+    def add(self, images, *filter_specs):
+        filters = [
+            Filter(spec)
+            for filter_spec in filter_specs
+            for spec in Filter.expand_spec(filter_spec)
+        ]
+        for image in images:
+            if image is None:
+                continue
+            self.images[image.pk] = image
+            self.filters[image.pk].update((filter.spec, filter) for filter in filters)
+            image.prefetched_renditions = PrefetchedRenditions(self, image.pk)
+        return self
+
+    def get(self, image_id):
+        if self.renditions is None:
+            self.renditions = self.load()
+        return self.renditions[image_id]
+
+    def load(self):
+        Rendition = get_image_model().get_rendition_model()
+        cache_keys = {
+            Rendition.construct_cache_key(
+                image, filter.get_cache_key(image), filter.spec
+            ): (image.pk, filter.spec)
+            for image in self.images.values()
+            for filter in self.filters[image.pk].values()
+        }
+        found = {}
+        for cache_key, rendition in Rendition.cache_backend.get_many(
+            cache_keys
+        ).items():
+            # Wagtail doesn't write renditions marked like this back to the cache
+            rendition._from_cache = True
+            found[cache_keys[cache_key]] = rendition
+
+        missing = set(cache_keys.values()) - set(found)
+        if missing:
+            for rendition in Rendition.objects.filter(
+                image_id__in={image_id for image_id, spec in missing},
+                filter_spec__in={spec for image_id, spec in missing},
+            ):
+                key = (rendition.image_id, rendition.filter_spec)
+                if key not in missing:
+                    continue
+                image = self.images[rendition.image_id]
+                filter = self.filters[rendition.image_id][rendition.filter_spec]
+                if rendition.focal_point_key == filter.get_cache_key(image):
+                    rendition.image = image
+                    found[key] = rendition
+
+            to_create = defaultdict(list)
+            for image_id, spec in missing - set(found):
+                to_create[image_id].append(self.filters[image_id][spec])
+            for image_id, filters in to_create.items():
+                for filter, rendition in (
+                    self.images[image_id].create_renditions(*filters).items()
+                ):
+                    found[image_id, filter.spec] = rendition
+
+            Rendition.cache_backend.set_many(
+                {
+                    rendition.get_cache_key(): rendition
+                    for key, rendition in found.items()
+                    if key in missing
+                }
+            )
+
+        renditions = {image_id: [] for image_id in self.images}
+        for (image_id, spec), rendition in found.items():
+            renditions[image_id].append(rendition)
+        return renditions
+
+
+class PrefetchedRenditions:
+    """
+    Stands in for the list of an image's prefetched renditions until its batch
+    is loaded.
+    """
+
+    def __init__(self, batch, image_id):
+        self.batch = batch
+        self.image_id = image_id
+
+    def __iter__(self):
+        return iter(self.batch.get(self.image_id))
+
+    def append(self, rendition):
+        self.batch.get(self.image_id).append(rendition)
+
+
+def prefetch_renditions(images, *filter_specs):
+    """
+    Fetches or creates the renditions of all the `images` for `filter_specs`
+    as one batch, when the first of them is rendered. Images that are None
+    are skipped.
+    """
+    return RenditionBatch().add(images, *filter_specs)
+
+
+def load_images(pages, *field_names):
+    """
+    Loads the images in the `field_names` of `pages` (by default "image") with
+    a single query. Pages without the field, without an image in it or with
+    the image already loaded are skipped.
+    """
+    field_names = field_names or ("image",)
+    image_fields = [
+        (page, field_name)
+        for page in pages
+        for field_name in field_names
+        if getattr(page, f"{field_name}_id", None)
+        # e.g. pages served from the cache, which keeps their loaded images
+        and not page._meta.get_field(field_name).is_cached(page)
+    ]
+    images = get_image_model().objects.in_bulk(
+        {getattr(page, f"{field_name}_id") for page, field_name in image_fields}
+    )
+    for page, field_name in image_fields:
+        image = images.get(getattr(page, f"{field_name}_id"))
+        if image is not None:
+            setattr(page, field_name, image)
+
+
+# Renditions generation in the background. Images are queued once the
+# transaction that saved them is committed, and their renditions generated
+# by a pool of RENDITION_WARMUP_WORKERS threads in the web process, with
+# their own database connections. A rendition that is requested before it's
+# ready is generated by the request as before.
+warmup_disabled = ContextVar("rendition_warmup_disabled", default=False)
+warmup_executor = None
+warmup_lock = threading.Lock()
+queued_warmups = set()
+
+
+@contextmanager
+def disable_rendition_warmup():
+    """
+    Skips generating the renditions of the images saved inside the block in
+    the background, e.g. for images whose renditions are generated anyway.
+    """
+    token = warmup_disabled.set(True)
+    try:
+        yield
+    finally:
+        warmup_disabled.reset(token)
+
+
+def get_warmup_executor():
+    global warmup_executor
+    with warmup_lock:
+        if warmup_executor is None:
+            warmup_executor = ThreadPoolExecutor(
+                max_workers=settings.RENDITION_WARMUP_WORKERS,
+                thread_name_prefix="rendition-warmup",
+            )
+        return warmup_executor
+
+
+def generate_renditions(image_id, filter_specs):
+    """
+    Generates the renditions of the image `image_id` for `filter_specs` that
+    don't exist yet. Runs in a worker thread.
+    """
+    with warmup_lock:
+        queued_warmups.discard((image_id, filter_specs))
+    try:
+        image = get_image_model().objects.filter(pk=image_id).first()
+        if image is not None:
+            image.get_renditions(*filter_specs)
+    except Exception:
+        logger.exception("Failed to generate the renditions of image %s", image_id)
+    finally:
+        connections.close_all()
+
+
+def queue_renditions(image_id, *filter_specs):
+    """
+    Queues the renditions of the image `image_id` for `filter_specs` to be
+    generated in the background, unless they already are.
+    """
+    if not getattr(settings, "RENDITION_WARMUP_WORKERS", 0) or warmup_disabled.get():
+        return
+    filter_specs = tuple(
+        sorted(
+            {
+                spec
+                for filter_spec in filter_specs
+                for spec in Filter.expand_spec(filter_spec)
+            }
+        )
+    )
+
+    def submit():
+        with warmup_lock:
+            if (image_id, filter_specs) in queued_warmups:
+                return
+            queued_warmups.add((image_id, filter_specs))
+        get_warmup_executor().submit(generate_renditions, image_id, filter_specs)
+
+    transaction.on_commit(submit)
+
+
+def queue_page_renditions(page):
+    """
+    Queues the renditions of the images that `page` references to be
+    generated in the background, for the templates that show them.
+    """
+    renditions = PAGE_IMAGE_RENDITIONS.get(page._meta.label, {})
+    references = (
+        ReferenceIndex.get_references_for_object(page)
+        .filter(to_content_type=ContentType.objects.get_for_model(get_image_model()))
+        .values_list("model_path", "to_object_id")
+    )
+    image_renditions = defaultdict(list)
+    for model_path, image_id in references:
+        image_renditions[int(image_id)] += [
+            *renditions.get(model_path, []),
+            *DEFAULT_PAGE_IMAGE_RENDITIONS.get(model_path, []),
+        ]
+    for image_id, filter_specs in image_renditions.items():
+        if filter_specs:
+            queue_renditions(image_id, *filter_specs)
@@ -0,0 +1,152 @@
+from django.db.models.signals import post_delete, post_save
+from wagtail.images import get_image_model
+from wagtail.models import Page, Site
+from wagtail.signals import (
+    page_published,
+    page_slug_changed,
+    page_unpublished,
+    post_page_move,
+    pre_page_move,
+    published,
+    unpublished,
+)
+
+from bakerydemo.breads.models import BreadType, Country
+
+from .dependencies import (
+    children_dependency,
+    purge_dependents,
+    purge_object_dependents,
+    purge_page_dependents,
+)
+from .footer import purge_footer_text_cache
+from .models import FooterText
+from .navigation import (
+    is_in_navigation,
+    purge_breadcrumb_cache,
+    purge_navigation_cache,
+)
+from .page_cache import purge_page_cache
+from .renditions import (
+    UPLOADED_IMAGE_RENDITIONS,
+    queue_page_renditions,
+    queue_renditions,
+)
+from .sites import bump_site_root_version
+
+
+def get_descendant_paths(page):
+    return list(
+        Page.objects.descendant_of(page, inclusive=True).values_list("path", flat=True)
+    )
+
+
+def purge_navigation_on_page_change(sender, instance, **kwargs):
+    purge_navigation_cache(instance.path)
+    purge_breadcrumb_cache(instance.path)
+
+
+def purge_navigation_on_slug_change(sender, instance, **kwargs):
+    # The URLs of all descendants change along with the slug
+    purge_breadcrumb_cache(*get_descendant_paths(instance))
+
+
+def purge_navigation_before_page_move(sender, instance, **kwargs):
+    # Moving a page changes the path of its whole subtree, so the entries cached
+    # under the old paths have to go before they can be reused by other pages
+    purge_breadcrumb_cache(*get_descendant_paths(instance))
+
+
+def purge_navigation_on_page_move(sender, instance, parent_page_before, **kwargs):
+    purge_navigation_cache(instance.path, parent_page_before.path)
+    purge_breadcrumb_cache(*get_descendant_paths(instance))
+
+
+def purge_footer_text_on_change(sender, instance, **kwargs):
+    purge_footer_text_cache()
+
+
+def bump_site_root_version_on_site_change(sender, instance, **kwargs):
+    bump_site_root_version()
+
+
+def bump_site_root_version_on_page_change(sender, instance, **kwargs):
+    # Only the live version of a site root, and its URL path, are cached
+    if instance.is_site_root():
+        bump_site_root_version()
+
+
+def purge_page_cache_on_page_change(sender, instance, **kwargs):
+    # The menus are shown on every page
+    if is_in_navigation(instance):
+        purge_page_cache()
+    else:
+        purge_page_dependents(instance)
+
+
+def purge_page_cache_on_page_move(sender, instance, parent_page_before, **kwargs):
+    purge_page_cache_on_page_change(sender, instance)
+    purge_dependents(children_dependency(parent_page_before.path))
+
+
+def purge_page_cache_on_object_change(sender, instance, **kwargs):
+    # Pages send page_published and page_unpublished as well
+    if not isinstance(instance, Page):
+        purge_object_dependents(instance)
+
+
+def purge_page_cache_on_global_change(sender, **kwargs):
+    purge_page_cache()
+
+
+def queue_renditions_on_image_save(sender, instance, raw=False, **kwargs):
+    # Fixtures are loaded with raw saves
+    if not raw and instance.file:
+        queue_renditions(instance.pk, *UPLOADED_IMAGE_RENDITIONS)
+
+
+def queue_renditions_on_page_publish(sender, instance, **kwargs):
+    queue_page_renditions(instance)
+
+
+def register_signal_handlers():
+    # These need to run before the navigation cache is purged, so they can
+    # tell whether a page was in the menus
+    page_published.connect(purge_page_cache_on_page_change)
+    page_unpublished.connect(purge_page_cache_on_page_change)
+    post_delete.connect(purge_page_cache_on_page_change, sender=Page)
+    pre_page_move.connect(purge_page_cache_on_page_change)
+    post_page_move.connect(purge_page_cache_on_page_move)
+
+    published.connect(purge_page_cache_on_object_change)
+    unpublished.connect(purge_page_cache_on_object_change)
+    # Models without a draft state are live as soon as they are saved
+    for model in (get_image_model(), BreadType, Country):
+        post_save.connect(purge_page_cache_on_object_change, sender=model)
+        post_delete.connect(purge_page_cache_on_object_change, sender=model)
+
+    # The footer is shown on every page, and sites change every URL
+    published.connect(purge_page_cache_on_global_change, sender=FooterText)
+    unpublished.connect(purge_page_cache_on_global_change, sender=FooterText)
+    post_delete.connect(purge_page_cache_on_global_change, sender=FooterText)
+    post_save.connect(purge_page_cache_on_global_change, sender=Site)
+    post_delete.connect(purge_page_cache_on_global_change, sender=Site)
+
+    page_published.connect(purge_navigation_on_page_change)
+    page_unpublished.connect(purge_navigation_on_page_change)
+    page_slug_changed.connect(purge_navigation_on_slug_change)
+    post_delete.connect(purge_navigation_on_page_change, sender=Page)
+    pre_page_move.connect(purge_navigation_before_page_move)
+    post_page_move.connect(purge_navigation_on_page_move)
+
+    published.connect(purge_footer_text_on_change, sender=FooterText)
+    unpublished.connect(purge_footer_text_on_change, sender=FooterText)
+    post_delete.connect(purge_footer_text_on_change, sender=FooterText)
+
+    post_save.connect(bump_site_root_version_on_site_change, sender=Site)
+    post_delete.connect(bump_site_root_version_on_site_change, sender=Site)
+    page_published.connect(bump_site_root_version_on_page_change)
+    post_page_move.connect(bump_site_root_version_on_page_change)
+
+    post_save.connect(queue_renditions_on_image_save, sender=get_image_model())
+    page_published.connect(queue_renditions_on_page_publish)
@@ -0,0 +1,74 @@
+import time
+
+from django.core.cache import cache
+from django.http.request import split_domain_port
+from wagtail.models import Site
+
+# Each worker keeps the sites it has resolved (along with their root pages) in
+# memory for a short while. Saving a Site or a site root page bumps a version
+# number in the shared cache, which makes every worker drop its entries.
+SITE_ROOT_CACHE_TIMEOUT = 60
+SITE_ROOT_VERSION_CACHE_KEY = "bakerydemo:site_root_version"
+
+
+class SiteRootCache:
+    """
+    A per-process cache of hostname and port to `(site, root_page)`.
+    `hits` and `misses` count lookups since the process started, and are
+    exported by the `metrics` view.
+    """
+
+    def __init__(self, timeout=SITE_ROOT_CACHE_TIMEOUT):
+        self.timeout = timeout
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, request):
+        key = (split_domain_port(request.get_host())[0], request.get_port())
+        version = cache.get(SITE_ROOT_VERSION_CACHE_KEY)
+        entry = self.entries.get(key)
+        if entry is not None:
+            expires_at, entry_version, site, root_page = entry
+            if expires_at > time.monotonic() and entry_version == version:
+                self.hits += 1
+                return site, root_page
+
+        self.misses += 1
+        site = Site._find_for_request(request)
+        root_page = site.root_page if site else None
+        self.entries[key] = (time.monotonic() + self.timeout, version, site, root_page)
+        return site, root_page
+
+    def clear(self):
+        self.entries.clear()
+
+
+site_root_cache = SiteRootCache()
+
+
+def get_site_and_root_page(request):
+    """
+    Returns the `(site, root_page)` serving this request from the per-process
+    cache. The site is also stored on the request the same way
+    `Site.find_for_request` does it, so Wagtail's own lookups reuse it.
+    """
+    if not hasattr(request, "_site_and_root_page"):
+        request._site_and_root_page = site_root_cache.get(request)
+        if not hasattr(request, "_wagtail_site"):
+            request._wagtail_site = request._site_and_root_page[0]
+    return request._site_and_root_page
+
+
+def bump_site_root_version():
+    try:
+        cache.incr(SITE_ROOT_VERSION_CACHE_KEY)
+    except ValueError:
+        # The version was evicted. Start again from a new value, so that the
+        # entries cached before don't look current.
+        cache.add(SITE_ROOT_VERSION_CACHE_KEY, time.time_ns(), None)
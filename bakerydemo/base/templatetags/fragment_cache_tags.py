@@ -0,0 +1,56 @@
+from django import template
+
+from bakerydemo.base.fragments import render_page_fragment
+
+register = template.Library()
+
+
+class PageFragmentNode(template.Node):
+    def __init__(self, nodelist, fragment_name, page, vary_on):
+        self.nodelist = nodelist
+        self.fragment_name = fragment_name
+        self.page = page
+        self.vary_on = vary_on
+
+    def render(self, context):
+        page = self.page.resolve(context)
+        if not page:
+            return self.nodelist.render(context)
+        return render_page_fragment(
+            self.fragment_name,
+            page,
+            context.get("request"),
+            lambda: self.nodelist.render(context),
+            [var.resolve(context) for var in self.vary_on],
+        )
+
+
+@register.tag
+def pagefragment(parser, token):
+    """
+    Caches the enclosed fragment of a page until the page or the content it
+    references changes, see base/fragments.py. Any further arguments are
+    values the fragment varies on, like Django's {% cache %}:
+
+        {% pagefragment "picture-card" page portrait %}
+            ...
+        {% endpagefragment %}
+    """
+    nodelist = parser.parse(("endpagefragment",))
+    parser.delete_first_token()
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires at least a fragment name and a page"
+        )
+    fragment_name = bits[1]
+    if not (fragment_name[0] == fragment_name[-1] and fragment_name[0] in "'\""):
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag's fragment name must be in quotes"
+        )
+    return PageFragmentNode(
+        nodelist,
+        fragment_name[1:-1],
+        parser.compile_filter(bits[2]),
+        [parser.compile_filter(bit) for bit in bits[3:]],
+    )
@@ -1,7 +1,10 @@
 from django import template
-from wagtail.models import Page, Site
+from wagtail.templatetags.wagtailcore_tags import richtext
 
-from bakerydemo.base.models import FooterText
+from bakerydemo.base.footer import get_footer_text_html
+from bakerydemo.base.navigation import get_breadcrumbs, get_navigation_tree
+from bakerydemo.base.pagination import CURSOR_PARAMS
+from bakerydemo.base.sites import get_site_and_root_page
 
 register = template.Library()
 # https://docs.djangoproject.com/en/3.2/howto/custom-template-tags/
@@ -12,14 +15,9 @@ def get_site_root(context):
     # This returns a core.Page. The main menu needs to have the site.root_page
     # defined else will return an object attribute error ('str' object has no
     # attribute 'get_children')
-    return Site.find_for_request(context["request"]).root_page
-
-
-def has_menu_children(page):
-    # This is used by the top_menu property
-    # get_children is a Treebeard API thing
-    # https://tabo.pe/projects/django-treebeard/docs/4.0.1/api.html
-    return page.get_children().live().in_menu().exists()
+    # Both the site and its root page come from a per-process cache, see
+    # base/sites.py
+    return get_site_and_root_page(context["request"])[1]
 
 
 def has_children(page):
@@ -33,21 +31,21 @@ def is_active(page, current_page):
 
 
 # Retrieves the top menu items - the immediate children of the parent page
-# The has_menu_children method is necessary because the Foundation menu requires
+# The show_dropdown attribute is necessary because the Foundation menu requires
 # a dropdown class to be applied to a parent
+# The menu is read from the cached navigation tree (see base/navigation.py), so
+# none of this hits the database once the tree has been built.
 @register.inclusion_tag("tags/top_menu.html", takes_context=True)
 def top_menu(context, parent, calling_page=None):
-    menuitems = parent.get_children().live().in_menu()
+    tree = get_navigation_tree(parent)
+    menuitems = tree.get(parent.path, [])
     for menuitem in menuitems:
-        menuitem.show_dropdown = has_menu_children(menuitem)
+        menuitem.navigation_tree = tree
+        menuitem.show_dropdown = bool(tree.get(menuitem.path))
         # We don't directly check if calling_page is None since the template
         # engine can pass an empty string to calling_page
         # if the variable passed as calling_page does not exist.
-        menuitem.active = (
-            calling_page.url_path.startswith(menuitem.url_path)
-            if calling_page
-            else False
-        )
+        menuitem.active = is_active(menuitem, calling_page)
     return {
         "calling_page": calling_page,
         "menuitems": menuitems,
@@ -59,19 +57,13 @@ def top_menu(context, parent, calling_page=None):
 # Retrieves the children of the top menu items for the drop downs
 @register.inclusion_tag("tags/top_menu_children.html", takes_context=True)
 def top_menu_children(context, parent, calling_page=None):
-    menuitems_children = parent.get_children()
-    menuitems_children = menuitems_children.live().in_menu()
+    # Menu items handed over by top_menu already carry the tree they came from
+    tree = getattr(parent, "navigation_tree", None) or get_navigation_tree(parent)
+    menuitems_children = tree.get(parent.path, [])
     for menuitem in menuitems_children:
-        menuitem.has_dropdown = has_menu_children(menuitem)
-        # We don't directly check if calling_page is None since the template
-        # engine can pass an empty string to calling_page
-        # if the variable passed as calling_page does not exist.
-        menuitem.active = (
-            calling_page.url_path.startswith(menuitem.url_path)
-            if calling_page
-            else False
-        )
-        menuitem.children = menuitem.get_children().live().in_menu()
+        menuitem.has_dropdown = bool(tree.get(menuitem.path))
+        menuitem.active = is_active(menuitem, calling_page)
+        menuitem.children = tree.get(menuitem.path, [])
     return {
         "parent": parent,
         "menuitems_children": menuitems_children,
@@ -87,7 +79,8 @@ def breadcrumbs(context):
         # When on the home page, displaying breadcrumbs is irrelevant.
         ancestors = ()
     else:
-        ancestors = Page.objects.ancestor_of(self, inclusive=True).filter(depth__gt=1)
+        # Resolved from the breadcrumb cache, see base/navigation.py
+        ancestors = get_breadcrumbs(self, context["request"])
     return {
         "ancestors": ancestors,
         "request": context["request"],
@@ -101,11 +94,24 @@ def get_footer_text(context):
     # or page types that need a custom footer
     footer_text = context.get("footer_text", "")
 
-    # If the context doesn't have footer_text defined, get one that's live
-    if not footer_text:
-        instance = FooterText.objects.filter(live=True).first()
-        footer_text = instance.body if instance else ""
+    # If the context doesn't have footer_text defined, use the rendered live one
+    # from the cache (see base/footer.py)
+    if footer_text:
+        footer_html = richtext(footer_text)
+    else:
+        footer_html = get_footer_text_html()
 
     return {
-        "footer_text": footer_text,
+        "footer_html": footer_html,
     }
+
+
+@register.simple_tag(takes_context=True)
+def cursor_url(context, **cursor):
+    # Links to another page of a cursor paginated listing, keeping the other
+    # query string parameters such as the search query
+    query = context["request"].GET.copy()
+    for param in ["page", *CURSOR_PARAMS]:
+        query.pop(param, None)
+    query.update(cursor)
+    return f"?{query.urlencode()}"
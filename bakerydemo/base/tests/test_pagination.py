@@ -0,0 +1,130 @@
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase, TestCase
+from wagtail.models import Page
+
+from bakerydemo.base.pagination import (
+    KeysetPaginator,
+    RankedKeysetPaginator,
+    encode_cursor,
+)
+
+
+class KeysetPaginatorTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        root = Page.get_first_root_node()
+        # Titles are repeated so that the id has to break the ties
+        cls.pages = [
+            root.add_child(instance=Page(title=title, slug=f"page-{index}"))
+            for index, title in enumerate("aaabbcd")
+        ]
+
+    def get_paginator(self):
+        return KeysetPaginator(
+            Page.objects.filter(pk__in=[page.pk for page in self.pages]),
+            3,
+            ordering=("title", "id"),
+        )
+
+    def get_expected_pks(self):
+        return [page.pk for page in sorted(self.pages, key=lambda p: (p.title, p.pk))]
+
+    def test_first_page(self):
+        page = self.get_paginator().page()
+        self.assertEqual([p.pk for p in page], self.get_expected_pks()[:3])
+        self.assertTrue(page.has_next())
+        self.assertFalse(page.has_previous())
+
+    def test_walk_forwards_and_backwards(self):
+        paginator = self.get_paginator()
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(after=pages[-1].next_cursor))
+        self.assertEqual(
+            [p.pk for page in pages for p in page], self.get_expected_pks()
+        )
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+
+        last_page = pages[-1]
+        self.assertFalse(last_page.has_next())
+        previous_page = paginator.page(before=last_page.previous_cursor)
+        self.assertEqual(list(previous_page), list(pages[1]))
+        first_page = paginator.page(before=previous_page.previous_cursor)
+        self.assertEqual(list(first_page), list(pages[0]))
+        self.assertFalse(first_page.has_previous())
+
+    def test_invalid_cursor_starts_from_the_first_page(self):
+        for cursor in ["not-a-cursor", encode_cursor(["a"])]:
+            with self.subTest(cursor=cursor):
+                page = self.get_paginator().page(after=cursor)
+                self.assertEqual([p.pk for p in page], self.get_expected_pks()[:3])
+
+    def test_cursor_of_deleted_row(self):
+        paginator = self.get_paginator()
+        cursor = paginator.page().next_cursor
+        Page.objects.get(pk=self.get_expected_pks()[2]).delete()
+        page = paginator.page(after=cursor)
+        self.assertEqual([p.pk for p in page], self.get_expected_pks()[3:6])
+
+
+class RankedResults(list):
+    def index(self, pk):
+        return [result.pk for result in self].index(pk)
+
+
+class RankedKeysetPaginatorTestCase(SimpleTestCase):
+    def setUp(self):
+        self.results = RankedResults(SimpleNamespace(pk=pk) for pk in range(1, 8))
+
+    def get_pks(self, page):
+        return [result.pk for result in page]
+
+    def test_first_page(self):
+        page = RankedKeysetPaginator(self.results, 3).page()
+        self.assertEqual(self.get_pks(page), [1, 2, 3])
+        self.assertTrue(page.has_next())
+        self.assertFalse(page.has_previous())
+
+    def test_walk_forwards_and_backwards(self):
+        paginator = RankedKeysetPaginator(self.results, 3)
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(after=pages[-1].next_cursor))
+        self.assertEqual(
+            [self.get_pks(page) for page in pages], [[1, 2, 3], [4, 5, 6], [7]]
+        )
+
+        previous_page = paginator.page(before=pages[-1].previous_cursor)
+        self.assertEqual(self.get_pks(previous_page), [4, 5, 6])
+        first_page = paginator.page(before=previous_page.previous_cursor)
+        self.assertEqual(self.get_pks(first_page), [1, 2, 3])
+        self.assertFalse(first_page.has_previous())
+
+    def test_invalid_cursor_starts_from_the_first_page(self):
+        for cursor in ["not-a-cursor", encode_cursor(["1", 1])]:
+            with self.subTest(cursor=cursor):
+                page = RankedKeysetPaginator(self.results, 3).page(after=cursor)
+                self.assertEqual(self.get_pks(page), [1, 2, 3])
+
+    def test_cursor_relocated_after_ranking_change(self):
+        cursor = RankedKeysetPaginator(self.results, 3).page().next_cursor
+        # The item the cursor points at (3) moves down by one
+        self.results.insert(3, self.results.pop(2))
+        page = RankedKeysetPaginator(self.results, 3).page(after=cursor)
+        self.assertEqual(self.get_pks(page), [5, 6, 7])
+
+    def test_cursor_of_deleted_row_starts_from_the_first_page(self):
+        cursor = RankedKeysetPaginator(self.results, 3).page().next_cursor
+        self.results.pop(2)
+        page = RankedKeysetPaginator(self.results, 3).page(after=cursor)
+        self.assertEqual(self.get_pks(page), [1, 2, 4])
+
+
+class SearchCursorPaginationTestCase(TestCase):
+    def test_cursor_without_query(self):
+        cursor = encode_cursor([10, 1])
+        for query in ["", "&q="]:
+            with self.subTest(query=query):
+                response = self.client.get(f"/search/?after={cursor}{query}")
+                self.assertEqual(response.status_code, 200)
@@ -0,0 +1,45 @@
+from django.test import TestCase
+
+from bakerydemo.base.query_counts import (
+    count_queries,
+    demo_content,
+    get_query_count_urls,
+    load_baseline,
+)
+
+
+class QueryCountTestCase(TestCase):
+    """
+    Renders every type of page in the demo content, the search view and the
+    API endpoints, and fails if any of them makes more queries, with cold or
+    with warm caches, than it did when the baseline was recorded. Run
+    `./manage.py update_query_counts` to record a new baseline after an
+    intended change.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        content = demo_content()
+        content.__enter__()
+        cls.addClassCleanup(content.__exit__, None, None, None)
+
+    def test_query_counts(self):
+        baseline = load_baseline()
+        for name, url in get_query_count_urls().items():
+            with self.subTest(name, url=url):
+                self.assertIn(
+                    name,
+                    baseline,
+                    f"{name} has no query count baseline, "
+                    "run ./manage.py update_query_counts",
+                )
+                status_code, counts = count_queries(self.client, url)
+                self.assertEqual(status_code, 200)
+                for caches, queries in counts.items():
+                    self.assertLessEqual(
+                        queries,
+                        baseline[name][caches],
+                        f"{url} made {queries} queries with {caches} caches, "
+                        f"up from {baseline[name][caches]}",
+                    )
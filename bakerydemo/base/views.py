@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.cache import never_cache
+
+from .metrics import metrics_registry
+
+
+@never_cache
+def metrics(request):
+    """
+    The performance metrics of this process in the Prometheus text format,
+    for scrapers that send `Authorization: Bearer <METRICS_TOKEN>`.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    authorization = request.headers.get("Authorization", "")
+    if not token or not constant_time_compare(authorization, f"Bearer {token}"):
+        raise Http404
+    return HttpResponse(
+        metrics_registry.render(), content_type="text/plain; version=0.0.4"
+    )
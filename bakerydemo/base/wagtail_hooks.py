@@ -4,6 +4,7 @@ from wagtail.admin.userbar import AccessibilityItem
 from wagtail.snippets.models import register_snippet
 from wagtail.snippets.views.snippets import SnippetViewSet, SnippetViewSetGroup
 
+from bakerydemo.base.dependencies import page_dependency, track_dependencies
 from bakerydemo.base.filters import RevisionFilterSetMixin
 from bakerydemo.base.models import FooterText, Person
 
@@ -44,6 +45,25 @@ def replace_userbar_accessibility_item(request, items):
     ]
 
 
+@hooks.register("before_serve_page")
+def enable_page_cache(page, request, serve_args, serve_kwargs):
+    # PageCacheMiddleware sets page_cache_enabled on the requests it may cache.
+    # Pages behind a password or login are never cached.
+    if (
+        hasattr(request, "page_cache_enabled")
+        and getattr(page, "page_cache_enabled", False)
+        and not page.get_view_restrictions().exists()
+    ):
+        request.page_cache_enabled = True
+        track_dependencies(page_dependency(page.path))
+
+
+@hooks.register("before_serve_page")
+def label_request_metrics(page, request, serve_args, serve_kwargs):
+    # Performance metrics are recorded per type of page, see base/metrics.py
+    request.metrics_label = type(page).__name__
+
+
 class PersonFilterSet(RevisionFilterSetMixin, WagtailFilterSet):
     class Meta:
         model = Person
@@ -0,0 +1,9 @@
+def init_worker():
+    """
+    Initializes the worker processes of the management commands that work in
+    parallel. Workers are forked with the parent's settings; make sure the app
+    registry is ready when they are spawned instead.
+    """
+    import django
+
+    django.setup()
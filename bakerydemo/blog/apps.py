@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class BlogAppConfig(AppConfig):
+    name = "bakerydemo.blog"
+    label = "blog"
+
+    def ready(self):
+        from .signal_handlers import register_signal_handlers
+
+        register_signal_handlers()
@@ -1,7 +1,10 @@
 from __future__ import unicode_literals
 
 from django.contrib import messages
+from django.core.cache import cache
 from django.db import models
+from django.db.models import Count, Prefetch
+from django.db.models.functions import Lower
 from django.shortcuts import redirect, render
 from modelcluster.contrib.taggit import ClusterTaggableManager
 from modelcluster.fields import ParentalKey
@@ -13,6 +16,18 @@ from wagtail.models import Orderable, Page
 from wagtail.search import index
 
 from bakerydemo.base.blocks import BaseStreamBlock
+from bakerydemo.base.dependencies import children_dependency, track_dependencies
+from bakerydemo.base.fragments import prefetch_page_fragments
+from bakerydemo.base.renditions import (
+    BLOG_LISTING_CARD_RENDITIONS,
+    prefetch_renditions,
+)
+
+# The tags of the posts below a blog index are cached under the index's path.
+# They are purged when a post is published, unpublished, moved or deleted, see
+# blog/signal_handlers.py
+CHILD_TAGS_CACHE_KEY = "bakerydemo:blog_child_tags:{}"
+CHILD_TAGS_CACHE_TIMEOUT = 60 * 60 * 24
 
 
 class BlogPersonRelationship(Orderable, models.Model):
@@ -87,7 +102,10 @@ class BlogPage(Page):
         FieldPanel("tags"),
     ]
 
+    # Matches in the introduction rank below the title (boost=2) but above
+    # the other fields
     search_fields = Page.search_fields + [
+        index.SearchField("introduction", boost=1.5),
         index.SearchField("body"),
     ]
 
@@ -99,6 +117,11 @@ class BlogPage(Page):
         with a loop on the template. If we tried to access the blog_person_
         relationship directly we'd print `blog.BlogPersonRelationship.None`
         """
+        # Listings load the authors of all their posts at once, using
+        # prefetch_authors below
+        if hasattr(self, "live_author_relationships"):
+            return [n.person for n in self.live_author_relationships]
+
         # Only return authors that are not in draft
         return [
             n.person
@@ -107,6 +130,22 @@ class BlogPage(Page):
             ).select_related("person")
         ]
 
+    @staticmethod
+    def prefetch_authors(posts):
+        """
+        Prefetches the live authors of every post in the `posts` queryset with a
+        single query, for `authors` to read from.
+        """
+        return posts.prefetch_related(
+            Prefetch(
+                "blog_person_relationship",
+                queryset=BlogPersonRelationship.objects.filter(
+                    person__live=True
+                ).select_related("person"),
+                to_attr="live_author_relationships",
+            )
+        )
+
     @property
     def get_tags(self):
         """
@@ -156,9 +195,16 @@ class BlogIndexPage(RoutablePageMixin, Page):
     # Specifies that only BlogPage objects can live under this index page
     subpage_types = ["BlogPage"]
 
+    # Served to anonymous visitors from the full page cache when
+    # PageCacheMiddleware is enabled, see base/page_cache.py
+    page_cache_enabled = True
+
     # Defines a method to access the children of the page (e.g. BlogPage
     # objects). On the demo site we use this on the HomePage
     def children(self):
+        # Listings are purged from the cache when a child changes, see
+        # base/dependencies.py
+        track_dependencies(children_dependency(self.path))
         return self.get_children().specific().live()
 
     # Overrides the context to list all child items, that are live, by the
@@ -166,8 +212,10 @@ class BlogIndexPage(RoutablePageMixin, Page):
     # https://docs.wagtail.org/en/stable/getting_started/tutorial.html#overriding-context
     def get_context(self, request):
         context = super(BlogIndexPage, self).get_context(request)
-        context["posts"] = (
-            BlogPage.objects.descendant_of(self).live().order_by("-date_published")
+        track_dependencies(children_dependency(self.path))
+        context["posts"] = self.prefetch_cards(
+            request,
+            BlogPage.objects.descendant_of(self).live().order_by("-date_published"),
         )
         return context
 
@@ -187,7 +235,8 @@ class BlogIndexPage(RoutablePageMixin, Page):
                 messages.add_message(request, messages.INFO, msg)
             return redirect(self.url)
 
-        posts = self.get_posts(tag=tag)
+        track_dependencies(children_dependency(self.path))
+        posts = self.prefetch_cards(request, self.get_posts(tag=tag))
         context = {"self": self, "tag": tag, "posts": posts}
         return render(request, "blog/blog_index_page.html", context)
 
@@ -195,6 +244,20 @@ class BlogIndexPage(RoutablePageMixin, Page):
         # Needed for previews to work
         return self.serve(request)
 
+    @staticmethod
+    def prefetch_cards(request, posts):
+        """
+        Loads the `posts` queryset with what their listing cards show. The
+        cards are looked up in the cache in one go, and so are the renditions
+        of the images of those that need rendering.
+        """
+        posts = BlogPage.prefetch_authors(posts.select_related("image"))
+        uncached = prefetch_page_fragments("blog-listing-card", posts, request)
+        prefetch_renditions(
+            [post.image for post in uncached], BLOG_LISTING_CARD_RENDITIONS
+        )
+        return posts
+
     # Returns the child BlogPage objects for this BlogPageIndex.
     # If a tag is used then it will filter the posts by tag.
     def get_posts(self, tag=None):
@@ -203,11 +266,32 @@ class BlogIndexPage(RoutablePageMixin, Page):
             posts = posts.filter(tags=tag)
         return posts
 
-    # Returns the list of Tags for all child posts of this BlogPage.
+    # Returns the list of Tags for all child posts of this BlogPage, each with
+    # the number of posts using it as `post_count`.
     def get_child_tags(self):
-        tags = []
-        for post in self.get_posts():
-            # Not tags.append() because we don't want a list of lists
-            tags += post.get_tags
-        tags = sorted(set(tags))
-        return tags
+        # The template asks for the tags more than once
+        if not hasattr(self, "_child_tags"):
+            key = CHILD_TAGS_CACHE_KEY.format(self.path)
+            self._child_tags = cache.get(key)
+            if self._child_tags is None:
+                self._child_tags = self.get_child_tags_uncached()
+                cache.set(key, self._child_tags, CHILD_TAGS_CACHE_TIMEOUT)
+        return self._child_tags
+
+    def get_child_tags_uncached(self):
+        # A single aggregate query, however many posts there are
+        tags = (
+            Tag.objects.filter(
+                blog_blogpagetag_items__content_object__in=self.get_posts()
+            )
+            .annotate(
+                post_count=Count(
+                    "blog_blogpagetag_items__content_object", distinct=True
+                )
+            )
+            .order_by(Lower("name"))
+        )
+        base_url = self.url
+        for tag in tags:
+            tag.url = f"{base_url}tags/{tag.slug}/"
+        return list(tags)
@@ -0,0 +1,22 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete
+from wagtail.models import Page
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+from .models import CHILD_TAGS_CACHE_KEY, BlogPage
+
+
+def purge_child_tags_on_post_change(sender, instance, **kwargs):
+    cache.delete(CHILD_TAGS_CACHE_KEY.format(instance.path[: -Page.steplen]))
+
+
+def purge_child_tags_on_post_move(sender, instance, parent_page_before, **kwargs):
+    purge_child_tags_on_post_change(sender, instance)
+    cache.delete(CHILD_TAGS_CACHE_KEY.format(parent_page_before.path))
+
+
+def register_signal_handlers():
+    page_published.connect(purge_child_tags_on_post_change, sender=BlogPage)
+    page_unpublished.connect(purge_child_tags_on_post_change, sender=BlogPage)
+    post_delete.connect(purge_child_tags_on_post_change, sender=BlogPage)
+    post_page_move.connect(purge_child_tags_on_post_move, sender=BlogPage)
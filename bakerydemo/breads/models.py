@@ -1,6 +1,6 @@
 from django import forms
 from django.contrib.contenttypes.fields import GenericRelation
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.core.paginator import EmptyPage, PageNotAnInteger
 from django.db import models
 from modelcluster.fields import ParentalManyToManyField
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel
@@ -9,6 +9,11 @@ from wagtail.models import DraftStateMixin, Page, RevisionMixin
 from wagtail.search import index
 
 from bakerydemo.base.blocks import BaseStreamBlock
+from bakerydemo.base.counts import CountedPaginator, get_listing_count
+from bakerydemo.base.dependencies import children_dependency, track_dependencies
+from bakerydemo.base.fragments import prefetch_page_fragments
+from bakerydemo.base.pagination import KeysetPaginator, is_cursor_pagination
+from bakerydemo.base.renditions import LISTING_CARD_RENDITIONS, prefetch_renditions
 
 
 class Country(models.Model):
@@ -153,7 +158,10 @@ class BreadPage(Page):
         ),
     ]
 
+    # Matches in the introduction rank below the title (boost=2) but above
+    # the other fields
     search_fields = Page.search_fields + [
+        index.SearchField("introduction", boost=1.5),
         index.SearchField("body"),
     ]
 
@@ -187,25 +195,48 @@ class BreadsIndexPage(Page):
     # Can only have BreadPage children
     subpage_types = ["BreadPage"]
 
+    # Served to anonymous visitors from the full page cache when
+    # PageCacheMiddleware is enabled, see base/page_cache.py
+    page_cache_enabled = True
+
     # Returns a queryset of BreadPage objects that are live, that are direct
     # descendants of this index page with most recent first
     def get_breads(self):
         return (
-            BreadPage.objects.live().descendant_of(self).order_by("-first_published_at")
+            BreadPage.objects.live()
+            .descendant_of(self)
+            .select_related("image")
+            .order_by("-first_published_at")
         )
 
     # Allows child objects (e.g. BreadPage objects) to be accessible via the
     # template. We use this on the HomePage to display child items of featured
     # content
     def children(self):
+        # Listings are purged from the cache when a child changes, see
+        # base/dependencies.py
+        track_dependencies(children_dependency(self.path))
         return self.get_children().specific().live()
 
     # Pagination for the index page. We use the `django.core.paginator` as any
     # standard Django app would, but the difference here being we have it as a
     # method on the model rather than within a view function
     def paginate(self, request, *args):
+        # Cursor pagination doesn't slow down on deep pages, see
+        # base/pagination.py. Page number URLs are still served below.
+        if is_cursor_pagination(request):
+            paginator = KeysetPaginator(
+                self.get_breads(), 12, ordering=("-first_published_at", "-id")
+            )
+            return paginator.page(
+                after=request.GET.get("after"), before=request.GET.get("before")
+            )
+
         page = request.GET.get("page")
-        paginator = Paginator(self.get_breads(), 12)
+        # The total is kept up to date in the cache by breads/signal_handlers.py
+        paginator = CountedPaginator(
+            self.get_breads(), 12, count=get_listing_count(self.path, self.get_breads())
+        )
         try:
             pages = paginator.page(page)
         except PageNotAnInteger:
@@ -218,9 +249,16 @@ class BreadsIndexPage(Page):
     # template
     def get_context(self, request):
         context = super(BreadsIndexPage, self).get_context(request)
+        track_dependencies(children_dependency(self.path))
 
         # BreadPage objects (get_breads) are passed through pagination
         breads = self.paginate(request, self.get_breads())
+        # The cards are looked up in the cache in one go, and so are the
+        # renditions of the images of those that need rendering
+        uncached = prefetch_page_fragments("listing-card", breads, request)
+        prefetch_renditions(
+            [bread.image for bread in uncached], LISTING_CARD_RENDITIONS
+        )
 
         context["breads"] = breads
 
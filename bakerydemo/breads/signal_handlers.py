@@ -0,0 +1,30 @@
+from django.db.models.signals import post_delete
+from wagtail.models import Page
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+from bakerydemo.base.counts import update_listing_count
+
+from .models import BreadPage, BreadsIndexPage
+
+
+def update_breads_count(index_path):
+    # The index may be going away along with the bread
+    index = BreadsIndexPage.objects.filter(path=index_path).first()
+    if index is not None:
+        update_listing_count(index.path, index.get_breads())
+
+
+def update_breads_count_on_bread_change(sender, instance, **kwargs):
+    update_breads_count(instance.path[: -Page.steplen])
+
+
+def update_breads_count_on_bread_move(sender, instance, parent_page_before, **kwargs):
+    update_breads_count_on_bread_change(sender, instance)
+    update_breads_count(parent_page_before.path)
+
+
+def register_signal_handlers():
+    page_published.connect(update_breads_count_on_bread_change, sender=BreadPage)
+    page_unpublished.connect(update_breads_count_on_bread_change, sender=BreadPage)
+    post_delete.connect(update_breads_count_on_bread_change, sender=BreadPage)
+    post_page_move.connect(update_breads_count_on_bread_move, sender=BreadPage)
@@ -10,6 +10,9 @@ from wagtail.models import Orderable, Page
 from wagtail.search import index
 
 from bakerydemo.base.blocks import BaseStreamBlock
+from bakerydemo.base.dependencies import children_dependency, track_dependencies
+from bakerydemo.base.fragments import prefetch_page_fragments
+from bakerydemo.base.renditions import PICTURE_CARD_RENDITIONS, prefetch_renditions
 from bakerydemo.locations.choices import DAY_CHOICES
 
 
@@ -80,10 +83,17 @@ class LocationsIndexPage(Page):
     # Only LocationPage objects can be added underneath this index page
     subpage_types = ["LocationPage"]
 
+    # Served to anonymous visitors from the full page cache when
+    # PageCacheMiddleware is enabled, see base/page_cache.py
+    page_cache_enabled = True
+
     # Allows children of this indexpage to be accessible via the indexpage
     # object on templates. We use this on the homepage to show featured
     # sections of the site and their child pages
     def children(self):
+        # Listings are purged from the cache when a child changes, see
+        # base/dependencies.py
+        track_dependencies(children_dependency(self.path))
         return self.get_children().specific().live()
 
     # Overrides the context to list all child
@@ -91,8 +101,20 @@ class LocationsIndexPage(Page):
     # https://docs.wagtail.org/en/stable/getting_started/tutorial.html#overriding-context
     def get_context(self, request):
         context = super(LocationsIndexPage, self).get_context(request)
+        track_dependencies(children_dependency(self.path))
         context["locations"] = (
-            LocationPage.objects.descendant_of(self).live().order_by("title")
+            LocationPage.objects.descendant_of(self)
+            .live()
+            .select_related("image")
+            .order_by("title")
+        )
+        # The cards are looked up in the cache in one go, and so are the
+        # renditions of the images of those that need rendering
+        uncached = prefetch_page_fragments(
+            "picture-card", context["locations"], request, [False]
+        )
+        prefetch_renditions(
+            [location.image for location in uncached], PICTURE_CARD_RENDITIONS
         )
         return context
 
@@ -134,7 +156,10 @@ class LocationPage(Page):
     )
 
     # Search index configuration
+    # Matches in the introduction rank below the title (boost=2) but above
+    # the other fields
     search_fields = Page.search_fields + [
+        index.SearchField("introduction", boost=1.5),
         index.SearchField("address"),
         index.SearchField("body"),
     ]
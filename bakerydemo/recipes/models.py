@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Prefetch
 from modelcluster.fields import ParentalKey
 from wagtail.admin.panels import (
     FieldPanel,
@@ -11,6 +12,7 @@ from wagtail.models import Orderable, Page
 from wagtail.search import index
 
 from bakerydemo.base.blocks import BaseStreamBlock
+from bakerydemo.base.dependencies import children_dependency, track_dependencies
 
 from .blocks import RecipeStreamBlock
 
@@ -102,7 +104,10 @@ class RecipePage(Page):
         ),
     ]
 
+    # Matches in the introduction rank below the title (boost=2) but above
+    # the other fields
     search_fields = Page.search_fields + [
+        index.SearchField("introduction", boost=1.5),
         index.SearchField("backstory"),
         index.SearchField("body"),
     ]
@@ -115,6 +120,11 @@ class RecipePage(Page):
         with a loop on the template. If we tried to access the recipe_person_
         relationship directly we'd print `recipe.RecipePersonRelationship.None`
         """
+        # Listings load the authors of all their recipes at once, using
+        # prefetch_authors below
+        if hasattr(self, "live_author_relationships"):
+            return [n.person for n in self.live_author_relationships]
+
         # Only return authors that are not in draft
         return [
             n.person
@@ -123,6 +133,22 @@ class RecipePage(Page):
             ).select_related("person")
         ]
 
+    @staticmethod
+    def prefetch_authors(recipes):
+        """
+        Prefetches the live authors of every recipe in the `recipes` queryset
+        with a single query, for `authors` to read from.
+        """
+        return recipes.prefetch_related(
+            Prefetch(
+                "recipe_person_relationship",
+                queryset=RecipePersonRelationship.objects.filter(
+                    person__live=True
+                ).select_related("person"),
+                to_attr="live_author_relationships",
+            )
+        )
+
     # Specifies parent to Recipe as being RecipeIndexPages
     parent_page_types = ["RecipeIndexPage"]
 
@@ -150,6 +176,9 @@ class RecipeIndexPage(Page):
     # Defines a method to access the children of the page (e.g. RecipePage
     # objects).
     def children(self):
+        # Listings are purged from the cache when a child changes, see
+        # base/dependencies.py
+        track_dependencies(children_dependency(self.path))
         return self.get_children().specific().live()
 
     # Overrides the context to list all child items, that are live, by the
@@ -157,7 +186,8 @@ class RecipeIndexPage(Page):
     # https://docs.wagtail.org/en/stable/getting_started/tutorial.html#overriding-context
     def get_context(self, request):
         context = super(RecipeIndexPage, self).get_context(request)
-        context["recipes"] = (
+        track_dependencies(children_dependency(self.path))
+        context["recipes"] = RecipePage.prefetch_authors(
             RecipePage.objects.descendant_of(self).live().order_by("-date_published")
         )
         return context
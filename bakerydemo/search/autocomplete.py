@@ -0,0 +1,168 @@
+import logging
+import re
+import threading
+
+from django.core.cache import cache
+from django.db import connections, transaction
+from wagtail.models import Page
+
+from bakerydemo.blog.models import BlogPage
+from bakerydemo.breads.models import BreadPage
+from bakerydemo.locations.models import LocationPage
+from bakerydemo.recipes.models import RecipePage
+
+from .results import is_elasticsearch
+
+logger = logging.getLogger(__name__)
+
+# Search-as-you-type suggestions: the titles of live pages of these types whose
+# words start with the words typed so far. Elasticsearch answers them with its
+# own autocomplete. Otherwise each worker keeps a prefix tree of the titles in
+# memory, so a suggestion costs a single cache lookup rather than a search of
+# the database index. Publishing, unpublishing, moving or deleting a page bumps
+# a version number in the shared cache and rebuilds the tree of the worker
+# that made the change once the transaction is committed. Other workers notice
+# the new version on their next lookup. Trees are rebuilt in a background
+# thread and swapped in when they are complete, the old one answering lookups
+# until then.
+AUTOCOMPLETE_PAGE_TYPES = [BreadPage, BlogPage, LocationPage, RecipePage]
+AUTOCOMPLETE_VERSION_CACHE_KEY = "bakerydemo:autocomplete_version"
+AUTOCOMPLETE_MAX_RESULTS = 8
+AUTOCOMPLETE_MAX_QUERY_LENGTH = 50
+
+WORD_RE = re.compile(r"\w+")
+
+
+def get_words(text):
+    return WORD_RE.findall(text.lower())
+
+
+class TitleTrie:
+    """
+    A prefix tree of the words in page titles. Each node holds the ids of the
+    titles that have a word starting with the prefix leading to it.
+    """
+
+    def __init__(self, titles):
+        # titles is a list of (title, url) in the order they should be suggested
+        self.titles = titles
+        self.root = {}
+        for index, (title, url) in enumerate(titles):
+            for word in get_words(title):
+                node = self.root
+                for char in word:
+                    node = node.setdefault(char, {})
+                    node.setdefault(None, set()).add(index)
+
+    def find(self, prefix):
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return set()
+        return node.get(None, set())
+
+    def search(self, query, limit):
+        # Every word of the query has to prefix a word of the title
+        matches = None
+        for word in get_words(query):
+            found = self.find(word)
+            matches = found if matches is None else matches & found
+            if not matches:
+                return []
+        return [self.titles[index] for index in sorted(matches or ())[:limit]]
+
+
+class AutocompleteIndex:
+    """
+    The per-process `TitleTrie`, rebuilt in the background when the shared
+    version changes.
+    """
+
+    def __init__(self):
+        # The version and the trie built for it, replaced together
+        self.current = (None, None)
+        self.lock = threading.Lock()
+        self.rebuilding = False
+
+    def build(self):
+        pages = (
+            Page.objects.live()
+            .type(*AUTOCOMPLETE_PAGE_TYPES)
+            .order_by("title")
+            .only("id", "title", "url_path")
+        )
+        return TitleTrie([(page.title, page.get_url()) for page in pages])
+
+    def rebuild(self):
+        try:
+            while True:
+                version = cache.get(AUTOCOMPLETE_VERSION_CACHE_KEY)
+                self.current = (version, self.build())
+                # Build again if pages changed while this one was built
+                with self.lock:
+                    if cache.get(AUTOCOMPLETE_VERSION_CACHE_KEY) == version:
+                        self.rebuilding = False
+                        return
+        except Exception:
+            logger.exception("Failed to rebuild the autocomplete index")
+            with self.lock:
+                self.rebuilding = False
+        finally:
+            connections.close_all()
+
+    def schedule_rebuild(self):
+        with self.lock:
+            if self.rebuilding:
+                return
+            self.rebuilding = True
+        threading.Thread(
+            target=self.rebuild, name="autocomplete-rebuild", daemon=True
+        ).start()
+
+    def search(self, query, limit):
+        version, trie = self.current
+        if trie is None:
+            # Nothing to serve from until the first tree is built
+            version = cache.get(AUTOCOMPLETE_VERSION_CACHE_KEY)
+            trie = self.build()
+            self.current = (version, trie)
+        elif cache.get(AUTOCOMPLETE_VERSION_CACHE_KEY) != version:
+            self.schedule_rebuild()
+        return trie.search(query, limit)
+
+
+autocomplete_index = AutocompleteIndex()
+
+
+def bump_autocomplete_version():
+    try:
+        cache.incr(AUTOCOMPLETE_VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(AUTOCOMPLETE_VERSION_CACHE_KEY, 1, None)
+
+
+def rebuild_autocomplete_index():
+    """
+    Once the current transaction is committed, bumps the shared version and
+    rebuilds this process's tree in the background.
+    """
+
+    def rebuild():
+        bump_autocomplete_version()
+        autocomplete_index.schedule_rebuild()
+
+    transaction.on_commit(rebuild)
+
+
+def get_suggestions(query, request=None, limit=AUTOCOMPLETE_MAX_RESULTS):
+    """
+    Returns up to `limit` `(title, url)` suggestions for what has been typed.
+    """
+    query = query.strip()[:AUTOCOMPLETE_MAX_QUERY_LENGTH]
+    if not get_words(query):
+        return []
+    if is_elasticsearch():
+        pages = Page.objects.live().type(*AUTOCOMPLETE_PAGE_TYPES).autocomplete(query)
+        return [(page.title, page.get_url(request)) for page in pages[:limit]]
+    return autocomplete_index.search(query, limit)
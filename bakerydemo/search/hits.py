@@ -0,0 +1,139 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections, models, transaction
+from django.utils import timezone
+from wagtail.contrib.search_promotions.models import Query, QueryDailyHits
+from wagtail.search.utils import normalise_query_string
+
+logger = logging.getLogger(__name__)
+
+# Search hits are counted in memory by each worker and written in bulk from a
+# background thread, either every SEARCH_HIT_FLUSH_INTERVAL seconds or once
+# SEARCH_HIT_BUFFER_SIZE searches have been counted, rather than with a
+# get-or-create and an UPDATE of the same rows on every search. Whatever is
+# left is written when the process exits. With SEARCH_HIT_BUFFERING off, hits
+# are written straight away like Wagtail does it.
+
+
+def is_buffering_enabled():
+    return getattr(settings, "SEARCH_HIT_BUFFERING", False)
+
+
+def write_hits(hits):
+    """
+    Adds `hits`, a mapping of `(query_string, date)` to a number of hits, to
+    the search promotions tables in a handful of queries.
+    """
+    query_strings = {query_string for query_string, date in hits}
+    with transaction.atomic():
+        Query.objects.bulk_create(
+            [Query(query_string=query_string) for query_string in query_strings],
+            ignore_conflicts=True,
+        )
+        query_ids = dict(
+            Query.objects.filter(query_string__in=query_strings).values_list(
+                "query_string", "id"
+            )
+        )
+        QueryDailyHits.objects.bulk_create(
+            [
+                QueryDailyHits(query_id=query_ids[query_string], date=date)
+                for query_string, date in hits
+            ],
+            ignore_conflicts=True,
+        )
+
+        # One UPDATE per date and number of hits, which is usually one or two
+        updates = {}
+        for (query_string, date), count in hits.items():
+            updates.setdefault((date, count), []).append(query_ids[query_string])
+        for (date, count), ids in updates.items():
+            QueryDailyHits.objects.filter(query_id__in=ids, date=date).update(
+                hits=models.F("hits") + count
+            )
+
+
+class SearchHitBuffer:
+    """
+    Counts search hits per query and day until they are flushed.
+    """
+
+    def __init__(self, flush_interval=10, max_size=100):
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.hits = Counter()
+        self.size = 0
+        self.timer = None
+
+    def record(self, query_string):
+        key = (normalise_query_string(query_string), timezone.now().date())
+        with self.lock:
+            self.hits[key] += 1
+            self.size += 1
+            if self.size >= self.max_size:
+                hits = self.take()
+                threading.Thread(
+                    target=self.write_in_thread, args=(hits,), daemon=True
+                ).start()
+            elif self.timer is None:
+                self.timer = threading.Timer(self.flush_interval, self.flush_in_thread)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def take(self):
+        # Must be called with the lock held
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        hits, self.hits = self.hits, Counter()
+        self.size = 0
+        return hits
+
+    def write(self, hits):
+        if hits:
+            started_at = time.monotonic()
+            write_hits(hits)
+            logger.debug(
+                "Wrote %d search hits in %.3fs",
+                sum(hits.values()),
+                time.monotonic() - started_at,
+            )
+
+    def write_in_thread(self, hits):
+        try:
+            self.write(hits)
+        except Exception:
+            logger.exception("Failed to write search hits")
+        finally:
+            # Each thread opens its own database connection
+            connections.close_all()
+
+    def flush(self):
+        with self.lock:
+            hits = self.take()
+        self.write(hits)
+
+    def flush_in_thread(self):
+        with self.lock:
+            hits = self.take()
+        self.write_in_thread(hits)
+
+
+search_hit_buffer = SearchHitBuffer(
+    flush_interval=getattr(settings, "SEARCH_HIT_FLUSH_INTERVAL", 10),
+    max_size=getattr(settings, "SEARCH_HIT_BUFFER_SIZE", 100),
+)
+atexit.register(search_hit_buffer.flush)
+
+
+def record_search_hit(query_string):
+    if is_buffering_enabled():
+        search_hit_buffer.record(query_string)
+    else:
+        Query.get(query_string).add_hit()
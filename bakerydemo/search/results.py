@@ -0,0 +1,173 @@
+import hashlib
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import translation
+from wagtail.images import get_image_model
+from wagtail.models import Page
+from wagtail.search.utils import normalise_query_string
+
+from bakerydemo.blog.models import BlogPage
+from bakerydemo.breads.models import BreadPage
+from bakerydemo.locations.models import LocationPage
+from bakerydemo.recipes.models import RecipePage
+
+# The results of a search are cached for a short while as the ordered list of
+# the matching page ids, per normalized query, search backend and language.
+# Rendering a page of results then only loads the pages on it. All cached
+# results are dropped when a page is published, unpublished or deleted, see
+# search/signal_handlers.py. Only the ids of the first
+# SEARCH_RESULTS_CACHE_MAX_RESULTS results are cached, along with the total;
+# results past those are served from the search backend.
+SEARCH_RESULTS_CACHE_KEY = "bakerydemo:search_results:v2:{}:{}:{}:{}"
+SEARCH_RESULTS_GENERATION_KEY = "bakerydemo:search_results_generation"
+SEARCH_RESULTS_CACHE_MAX_RESULTS = 1000
+# How many pages iterating over cached results loads at once
+SEARCH_RESULTS_BATCH_SIZE = 100
+
+# The types of page searched with the database backends
+SEARCH_PAGE_TYPES = [BlogPage, BreadPage, LocationPage, RecipePage]
+
+# How each type of page is described in the search results
+SEARCH_RESULT_LABELS = {
+    BlogPage: "Blog Post",
+    LocationPage: "Location",
+    RecipePage: "Recipe",
+}
+DEFAULT_SEARCH_RESULT_LABEL = "Bread"
+
+
+def get_search_results_cache_timeout():
+    return getattr(settings, "SEARCH_RESULTS_CACHE_TIMEOUT", 60)
+
+
+def is_elasticsearch():
+    return "elasticsearch" in settings.WAGTAILSEARCH_BACKENDS["default"]["BACKEND"]
+
+
+def search_pages(search_query, pages):
+    if is_elasticsearch():
+        # In production, use ElasticSearch and a simplified search query, per
+        # https://docs.wagtail.org/en/stable/topics/search/backends.html
+        # like this:
+        return pages.search(search_query)
+
+    # If we aren't using ElasticSearch for the demo, fall back to native db search.
+    # The database index keeps all the indexed fields of the specific
+    # models, so a single search on `Page` restricted to the page types
+    # we want finds them all. PostgreSQL and MySQL rank them together by
+    # relevance using the boosts in their `search_fields`, SQLite returns them
+    # in tree order. The results are lazy, so only the page being shown is
+    # loaded.
+    return pages.type(*SEARCH_PAGE_TYPES).search(search_query)
+
+
+class CachedSearchResults(Sequence):
+    """
+    Search results from the cache. Slicing them loads just those pages, so
+    they can be handed to a paginator like the backend's own results. Pages
+    unpublished since the results were cached are left out.
+    """
+
+    def __init__(self, page_ids, total, search_query):
+        self.page_ids = page_ids
+        self.total = total
+        self.search_query = search_query
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            if index < 0:
+                index += self.total
+            pages = self[index : index + 1]
+            if not pages:
+                raise IndexError(index)
+            return pages[0]
+
+        start, stop, step = index.indices(self.total)
+        if step != 1:
+            return list(self)[index]
+        page_ids = self.page_ids[start:stop]
+        pages = Page.objects.live().in_bulk(page_ids)
+        results = [pages[page_id] for page_id in page_ids if page_id in pages]
+        if stop > len(self.page_ids):
+            # Past the cached ids, the results come from the search backend
+            results += search_pages(self.search_query, Page.objects.live())[
+                max(start, len(self.page_ids)) : stop
+            ]
+        return results
+
+    def __iter__(self):
+        for start in range(0, self.total, SEARCH_RESULTS_BATCH_SIZE):
+            yield from self[start : start + SEARCH_RESULTS_BATCH_SIZE]
+
+    def index(self, pk):
+        """
+        Returns the rank of the page `pk` among the cached results, without
+        loading any pages. Raises ValueError if it isn't one of them.
+        """
+        return self.page_ids.index(pk)
+
+    def count(self):
+        return self.total
+
+
+def purge_search_results_cache():
+    try:
+        cache.incr(SEARCH_RESULTS_GENERATION_KEY)
+    except ValueError:
+        cache.set(SEARCH_RESULTS_GENERATION_KEY, 1, None)
+
+
+def get_search_results(search_query):
+    # Queries that only differ in case or spacing share their results
+    search_query = normalise_query_string(search_query)
+    key = SEARCH_RESULTS_CACHE_KEY.format(
+        cache.get(SEARCH_RESULTS_GENERATION_KEY, 0),
+        settings.WAGTAILSEARCH_BACKENDS["default"]["BACKEND"],
+        translation.get_language(),
+        hashlib.md5(search_query.encode()).hexdigest(),
+    )
+    cached = cache.get(key)
+    if cached is None:
+        results = search_pages(search_query, Page.objects.live().only("id"))
+        page_ids = [page.pk for page in results[:SEARCH_RESULTS_CACHE_MAX_RESULTS]]
+        if len(page_ids) < SEARCH_RESULTS_CACHE_MAX_RESULTS:
+            total = len(page_ids)
+        else:
+            total = results.count()
+        cached = (page_ids, total)
+        cache.set(key, cached, get_search_results_cache_timeout())
+    return CachedSearchResults(*cached, search_query)
+
+
+def get_specific_results(results):
+    """
+    Returns the pages in `results` as their specific pages, in order, labelled
+    with `search_result_label` and with their images and renditions loaded.
+    Takes a query per page type and two for the images, however many results
+    there are.
+    """
+    results = list(results)
+    specific_pages = {
+        page.pk: page
+        for page in Page.objects.filter(
+            pk__in=[result.pk for result in results]
+        ).specific()
+    }
+    results = [
+        specific_pages[result.pk] for result in results if result.pk in specific_pages
+    ]
+
+    image_ids = {getattr(page, "image_id", None) for page in results} - {None}
+    images = get_image_model().objects.prefetch_renditions().in_bulk(image_ids)
+    for page in results:
+        if getattr(page, "image_id", None) in images:
+            page.image = images[page.image_id]
+        page.search_result_label = SEARCH_RESULT_LABELS.get(
+            type(page), DEFAULT_SEARCH_RESULT_LABEL
+        )
+    return results
@@ -0,0 +1,32 @@
+from django.db.models.signals import post_delete
+from wagtail.models import Page
+from wagtail.signals import (
+    page_published,
+    page_slug_changed,
+    page_unpublished,
+    post_page_move,
+)
+
+from .autocomplete import AUTOCOMPLETE_PAGE_TYPES, rebuild_autocomplete_index
+from .results import purge_search_results_cache
+
+
+def purge_search_caches_on_page_change(sender, instance, **kwargs):
+    purge_search_results_cache()
+
+
+def rebuild_autocomplete_on_page_change(sender, instance, **kwargs):
+    rebuild_autocomplete_index()
+
+
+def register_signal_handlers():
+    page_published.connect(purge_search_caches_on_page_change)
+    page_unpublished.connect(purge_search_caches_on_page_change)
+    post_delete.connect(purge_search_caches_on_page_change, sender=Page)
+
+    for model in AUTOCOMPLETE_PAGE_TYPES:
+        page_published.connect(rebuild_autocomplete_on_page_change, sender=model)
+        page_unpublished.connect(rebuild_autocomplete_on_page_change, sender=model)
+        page_slug_changed.connect(rebuild_autocomplete_on_page_change, sender=model)
+        post_page_move.connect(rebuild_autocomplete_on_page_change, sender=model)
+        post_delete.connect(rebuild_autocomplete_on_page_change, sender=model)
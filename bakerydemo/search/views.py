@@ -1,56 +1,48 @@
-from django.conf import settings
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.http import JsonResponse
 from django.shortcuts import render
-from wagtail.contrib.search_promotions.models import Query
-from wagtail.models import Page
+from django.views.decorators.cache import cache_control
 
-from bakerydemo.blog.models import BlogPage
-from bakerydemo.breads.models import BreadPage
-from bakerydemo.locations.models import LocationPage
+from bakerydemo.base.pagination import RankedKeysetPaginator, is_cursor_pagination
+
+from .autocomplete import get_suggestions
+from .hits import record_search_hit
+from .results import CachedSearchResults, get_search_results, get_specific_results
 
 
 def search(request):
     # Search
     search_query = request.GET.get("q", None)
     if search_query:
-        if "elasticsearch" in settings.WAGTAILSEARCH_BACKENDS["default"]["BACKEND"]:
-            # In production, use ElasticSearch and a simplified search query, per
-            # https://docs.wagtail.org/en/stable/topics/search/backends.html
-            # like this:
-            search_results = Page.objects.live().search(search_query)
-        else:
-            # If we aren't using ElasticSearch for the demo, fall back to native db search.
-            # But native DB search can't search specific fields in our models on a `Page` query.
-            # So for demo purposes ONLY, we hard-code in the model names we want to search.
-            blog_results = BlogPage.objects.live().search(search_query)
-            blog_page_ids = [p.page_ptr.id for p in blog_results]
-
-            bread_results = BreadPage.objects.live().search(search_query)
-            bread_page_ids = [p.page_ptr.id for p in bread_results]
-
-            location_results = LocationPage.objects.live().search(search_query)
-            location_result_ids = [p.page_ptr.id for p in location_results]
-
-            page_ids = blog_page_ids + bread_page_ids + location_result_ids
-            search_results = Page.objects.live().filter(id__in=page_ids)
-
-        query = Query.get(search_query)
+        # Served from the search results cache, see search/results.py
+        search_results = get_search_results(search_query)
 
-        # Record hit
-        query.add_hit()
+        # Record hit, buffered and written in bulk, see search/hits.py
+        record_search_hit(search_query)
 
     else:
-        search_results = Page.objects.none()
-
-    # Pagination
-    page = request.GET.get("page", 1)
-    paginator = Paginator(search_results, 10)
-    try:
-        search_results = paginator.page(page)
-    except PageNotAnInteger:
-        search_results = paginator.page(1)
-    except EmptyPage:
-        search_results = paginator.page(paginator.num_pages)
+        search_results = CachedSearchResults([], 0, "")
+
+    if is_cursor_pagination(request):
+        # Cursor pagination, see base/pagination.py. The cursors are keyed on
+        # the rank of a result and its id.
+        paginator = RankedKeysetPaginator(search_results, 10)
+        search_results = paginator.page(
+            after=request.GET.get("after"), before=request.GET.get("before")
+        )
+    else:
+        # Pagination. The total is cached along with the results.
+        page = request.GET.get("page", 1)
+        paginator = Paginator(search_results, 10)
+        try:
+            search_results = paginator.page(page)
+        except PageNotAnInteger:
+            search_results = paginator.page(1)
+        except EmptyPage:
+            search_results = paginator.page(paginator.num_pages)
+
+    # Resolve the specific pages and their images for the whole page at once
+    search_results.object_list = get_specific_results(search_results.object_list)
 
     return render(
         request,
@@ -60,3 +52,12 @@ def search(request):
             "search_results": search_results,
         },
     )
+
+
+# Suggestions only change on publish, so browsers and CDNs may keep them briefly
+@cache_control(public=True, max_age=60)
+def autocomplete(request):
+    suggestions = get_suggestions(request.GET.get("q", ""), request)
+    return JsonResponse(
+        {"results": [{"title": title, "url": url} for title, url in suggestions]}
+    )
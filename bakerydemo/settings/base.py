@@ -89,6 +89,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "bakerydemo.base.middleware.SiteRootCacheMiddleware",
     "wagtail.contrib.redirects.middleware.RedirectMiddleware",
 ]
 
@@ -206,6 +207,11 @@ WAGTAIL_CONTENT_LANGUAGES = LANGUAGES = [
 
 WAGTAILIMAGES_AVIF_QUALITY = 60
 
+# The number of threads generating the renditions of new images, and of the
+# images of published pages, in the background. 0 turns it off. See
+# bakerydemo/base/renditions.py.
+RENDITION_WARMUP_WORKERS = int(os.environ.get("RENDITION_WARMUP_WORKERS", 2))
+
 ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD", "changeme")
 
 # Content Security policy settings
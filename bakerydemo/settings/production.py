@@ -1,4 +1,5 @@
 # ruff: noqa: F405
+import json
 import os
 import random
 import string
@@ -247,6 +248,63 @@ if os.environ.get("BASIC_AUTH_ENABLED", "false").lower().strip() == "true":
     BASIC_AUTH_RESPONSE_TEMPLATE = "base/basic_auth.html"
 
 
+# Full page cache settings
+# Caches the rendered pages of the page types that opt in with
+# `page_cache_enabled` for anonymous visitors, in the default cache (Redis when
+# REDIS_URL is set). See bakerydemo/base/page_cache.py.
+if os.environ.get("PAGE_CACHE_ENABLED", "false").lower().strip() == "true":
+    # Needs to know about the user and their flash messages
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("django.contrib.messages.middleware.MessageMiddleware") + 1,
+        "bakerydemo.base.middleware.PageCacheMiddleware",
+    )
+
+    # How long a cached page is fresh for, in seconds
+    PAGE_CACHE_TIMEOUT = int(os.environ.get("PAGE_CACHE_TIMEOUT", 5 * 60))
+
+    # How long an expired page may still be served while it is re-rendered
+    PAGE_CACHE_STALE_TIMEOUT = int(os.environ.get("PAGE_CACHE_STALE_TIMEOUT", 60))
+
+
+# Page the bread listing and search results with `?after=` / `?before=` cursors
+# by default, which stay fast on deep pages. `?page=` URLs keep working. See
+# bakerydemo/base/pagination.py.
+KEYSET_PAGINATION = (
+    os.environ.get("KEYSET_PAGINATION", "false").lower().strip() == "true"
+)
+
+# Count search hits in memory and write them in bulk, rather than updating the
+# same rows on every search. See bakerydemo/search/hits.py.
+SEARCH_HIT_BUFFERING = (
+    os.environ.get("SEARCH_HIT_BUFFERING", "true").lower().strip() == "true"
+)
+
+# Write buffered hits at least this often, in seconds
+SEARCH_HIT_FLUSH_INTERVAL = int(os.environ.get("SEARCH_HIT_FLUSH_INTERVAL", 10))
+
+# Or as soon as this many searches have been counted
+SEARCH_HIT_BUFFER_SIZE = int(os.environ.get("SEARCH_HIT_BUFFER_SIZE", 100))
+
+# Record the query count, database, cache and template time, and latency of
+# each request, per type of page or view. They're served to Prometheus at
+# /metrics/ with `Authorization: Bearer $METRICS_TOKEN`. See
+# bakerydemo/base/metrics.py.
+if os.environ.get("METRICS_ENABLED", "true").lower().strip() == "true":
+    MIDDLEWARE.insert(0, "bakerydemo.base.middleware.MetricsMiddleware")
+
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+    # Requests over these limits are logged with their most repeated queries.
+    # Durations are in seconds. Override them with a JSON object in the
+    # PERFORMANCE_BUDGETS environment variable.
+    PERFORMANCE_BUDGETS = {
+        "default": {"queries": 30, "duration": 0.5},
+        "HomePage": {"queries": 40, "duration": 0.5},
+        "BreadsIndexPage": {"queries": 50, "duration": 0.5},
+        **json.loads(os.environ.get("PERFORMANCE_BUDGETS", "{}")),
+    }
+
+
 # Force HTTPS redirect (enabled by default!)
 # https://docs.djangoproject.com/en/stable/ref/settings/#secure-ssl-redirect
 SECURE_SSL_REDIRECT = True
@@ -8,6 +8,7 @@ from wagtail.contrib.sitemaps.views import sitemap
 from wagtail.documents import urls as wagtaildocs_urls
 from wagtail.images.views.serve import ServeView
 
+from bakerydemo.base import views as base_views
 from bakerydemo.search import views as search_views
 
 from .api import api_router
@@ -22,8 +23,10 @@ urlpatterns = [
         name="wagtailimages_serve",
     ),
     path("search/", search_views.search, name="search"),
+    path("search/autocomplete/", search_views.autocomplete, name="search_autocomplete"),
     path("sitemap.xml", sitemap),
     path("api/v2/", api_router.urls),
+    path("metrics/", base_views.metrics, name="metrics"),
     path("__debug__/", include(debug_toolbar.urls)),
 ]
 